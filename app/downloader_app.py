@@ -30,6 +30,13 @@ async def startup():
     await get_download_manager().load_persisted_jobs()
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    from app.database import shutdown_db
+
+    await shutdown_db()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def downloader_page(request: Request):
     settings = get_settings()
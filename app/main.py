@@ -11,7 +11,7 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, RedirectResponse
 
 from app.config import get_settings
-from app.database import startup_db
+from app.database import shutdown_db, startup_db
 
 # Paths
 APP_DIR = Path(__file__).parent
@@ -101,6 +101,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     await worker.stop()
     await ai_worker.stop()
+    await shutdown_db()
     print("Shutting down...")
 
 
@@ -12,6 +12,7 @@ from pydantic import BaseModel, Field
 from app.config import get_settings
 from app.database import get_db
 from app.services.source_manager import get_source_manager, ModelSource
+from app.services.worker import QueueWorker
 from app.websocket import broadcast
 
 router = APIRouter()
@@ -232,6 +233,7 @@ async def approve_ai_lookup_job(job_id: int):
                     ("hash_file", job["relpath"], now),
                 )
                 await db.commit()
+                QueueWorker.notify()
 
     await _update_job(job_id, {"decision": "approved", "decision_at": now})
     await _broadcast_job(job_id)
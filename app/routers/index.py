@@ -5,14 +5,18 @@ from pydantic import BaseModel
 from typing import Literal
 from datetime import datetime
 from pathlib import Path
+import asyncio
 import json
 
 from app.services.indexer import IndexerService
 from app.services.differ import compute_diff, DiffEntry
+from app.services.worker import QueueWorker
 from app.services.safetensors import (
     read_safetensors_header,
+    read_safetensors_headers,
     SafetensorsHeaderError,
     classify_safetensors_header,
+    classify_safetensors_file,
 )
 from app.config import get_settings
 from app.database import get_db
@@ -183,8 +187,7 @@ async def _classify_safetensors_cached(relpath: str, side: Literal["local", "lak
                     **payload,
                 }
 
-    header = await run_in_threadpool(read_safetensors_header, file_path)
-    result = classify_safetensors_header(header, relpath=relpath)
+    result = await run_in_threadpool(classify_safetensors_file, file_path, relpath)
     payload = {
         "tags": result.get("tags", []),
         "confidence": result.get("confidence", 0.0),
@@ -270,25 +273,28 @@ class SafetensorsBatchRequest(BaseModel):
     items: list[SafetensorsBatchItem]
 
 
+# Header reads are IO-bound, so a few files are classified at once.
+CLASSIFY_BATCH_CONCURRENCY = 8
+
+
 @router.post("/safetensors/classify-batch")
 async def classify_safetensors_batch(request: SafetensorsBatchRequest):
-    results = []
-    for item in request.items:
-        relpath = item.relpath
-        side = item.side
-        try:
-            payload = await _classify_safetensors_cached(relpath, side, force=False)
-            results.append(payload)
-        except Exception as exc:
-            results.append(
-                {
-                    "relpath": relpath,
-                    "side": side,
+    semaphore = asyncio.Semaphore(CLASSIFY_BATCH_CONCURRENCY)
+
+    async def classify_item(item: SafetensorsBatchItem) -> dict:
+        async with semaphore:
+            try:
+                return await _classify_safetensors_cached(item.relpath, item.side, force=False)
+            except Exception as exc:
+                return {
+                    "relpath": item.relpath,
+                    "side": item.side,
                     "status": "error",
                     "error": str(exc),
                 }
-            )
-    return {"results": results}
+
+    results = await asyncio.gather(*(classify_item(item) for item in request.items))
+    return {"results": list(results)}
 
 
 @router.post("/safetensors/reclassify")
@@ -309,6 +315,7 @@ async def reclassify_safetensors_all():
         )
         rows = await cursor.fetchall()
 
+    pending = []
     for row in rows:
         side_name = row["side"]
         relpath = row["relpath"]
@@ -319,40 +326,54 @@ async def reclassify_safetensors_all():
         if not file_path.exists():
             errors += 1
             continue
+        pending.append((side_name, relpath, file_path))
+
+    # Read headers in small batches on a thread pool so disk latency overlaps
+    # without holding every parsed header in memory at once.
+    batch_size = 32
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        headers = await run_in_threadpool(
+            lambda: list(read_safetensors_headers([item[2] for item in batch]))
+        )
 
-        try:
-            stat = file_path.stat()
-            header = await run_in_threadpool(read_safetensors_header, file_path)
-            result = classify_safetensors_header(header, relpath=relpath)
-            payload = {
-                "tags": result.get("tags", []),
-                "confidence": result.get("confidence", 0.0),
-                "signals": result.get("signals", []),
-                "signals_by_tag": result.get("signals_by_tag", {}),
-            }
-            cache_key = f"{side_name}:{relpath}"
-            async with get_db() as db:
-                await db.execute(
-                    """
-                    INSERT OR REPLACE INTO safetensors_cache
-                    (key, side, relpath, size, mtime_ns, payload_json, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        cache_key,
-                        side_name,
-                        relpath,
-                        stat.st_size,
-                        stat.st_mtime_ns,
-                        json.dumps(payload),
-                        datetime.now().isoformat(),
-                    ),
-                )
-                await db.commit()
-            updated += 1
-        except Exception:
-            errors += 1
-            continue
+        for (side_name, relpath, file_path), (_, header) in zip(batch, headers):
+            if isinstance(header, Exception):
+                errors += 1
+                continue
+
+            try:
+                stat = file_path.stat()
+                result = classify_safetensors_header(header, relpath=relpath)
+                payload = {
+                    "tags": result.get("tags", []),
+                    "confidence": result.get("confidence", 0.0),
+                    "signals": result.get("signals", []),
+                    "signals_by_tag": result.get("signals_by_tag", {}),
+                }
+                cache_key = f"{side_name}:{relpath}"
+                async with get_db() as db:
+                    await db.execute(
+                        """
+                        INSERT OR REPLACE INTO safetensors_cache
+                        (key, side, relpath, size, mtime_ns, payload_json, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (
+                            cache_key,
+                            side_name,
+                            relpath,
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                            json.dumps(payload),
+                            datetime.now().isoformat(),
+                        ),
+                    )
+                    await db.commit()
+                updated += 1
+            except Exception:
+                errors += 1
+                continue
 
     return {
         "status": "completed",
@@ -418,7 +439,7 @@ async def verify_hashes(request: VerifyRequest):
             
         await db.commit()
         
-    # Trigger worker check via broadcast (or worker polling picks it up)
-    # The worker polls, so it will pick it up automatically
+    # Wake the worker now rather than at its next fallback poll
+    QueueWorker.notify()
     
     return {"status": "queued"}
@@ -1,7 +1,11 @@
 """API Router for Remote Session management."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+import shlex
+import zlib
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 from typing import Optional, List
 
 from app.services.remote import get_session_manager, RemoteSessionManager
@@ -53,7 +57,7 @@ async def get_status():
     status_dict["remote_base_url"] = settings.remote_base_url
     status_dict["torch_index_url"] = settings.remote_torch_index_url
     status_dict["torch_index_flag"] = settings.remote_torch_index_flag
-    status_dict["torch_packages"] = settings.remote_torch_packages.split()
+    status_dict["torch_packages"] = shlex.split(settings.remote_torch_packages)
     
     return status_dict
 
@@ -123,9 +127,41 @@ async def get_next_task():
     task = await mgr.wait_for_task(timeout=20.0)
     return task
 
-@router.post("/tasks/progress", dependencies=[Depends(verify_remote_auth)])
-async def update_progress(update: TaskProgressUpdate):
-    """Update task progress."""
+# Largest decompressed progress body accepted (guards against gzip bombs)
+MAX_PROGRESS_BODY_BYTES = 8 * 1024 * 1024
+
+
+def _gunzip_progress_body(body: bytes) -> bytes:
+    """Decompress a gzip progress body, refusing corrupt or oversized ones."""
+    decompressor = zlib.decompressobj(wbits=31)  # 31: gzip header and trailer
+    try:
+        data = decompressor.decompress(body, MAX_PROGRESS_BODY_BYTES)
+        if decompressor.unconsumed_tail or (not decompressor.eof and len(data) >= MAX_PROGRESS_BODY_BYTES):
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Decompressed body exceeds {MAX_PROGRESS_BODY_BYTES} bytes",
+            )
+        if not decompressor.eof:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip body: truncated stream")
+    except zlib.error as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid gzip body: {exc}")
+    return data
+
+
+@router.post(
+    "/tasks/progress",
+    dependencies=[Depends(verify_remote_auth)],
+    openapi_extra={"requestBody": {"content": {"application/json": {"schema": TaskProgressUpdate.model_json_schema()}}}},
+)
+async def update_progress(request: Request):
+    """Update task progress. Large batch updates arrive gzip-encoded."""
+    body = await request.body()
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        body = _gunzip_progress_body(body)
+    try:
+        update = TaskProgressUpdate.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
     mgr = get_session_manager()
     mgr.update_task_progress(update)
     return {"status": "updated"}
@@ -7,9 +7,10 @@ from typing import Optional, Any
 
 from app.config import get_settings
 from app.services.source_manager import get_source_manager, ModelSource
+from app.services.worker import QueueWorker
 from app.database import get_db
 from app.services.ai_lookup_service import call_ai_lookup
-from app.services.url_utils import check_url_sync, filename_matches_url
+from app.services.url_utils import check_url as check_url_async, check_url_sync, filename_matches_url
 
 from starlette.concurrency import run_in_threadpool
 
@@ -22,7 +23,7 @@ async def check_url(url: str):
     Check if a URL is valid and reachable.
     Returns status code and file size if available.
     """
-    return await run_in_threadpool(check_url_sync, url)
+    return await check_url_async(url)
 
 
 class SourceURLRequest(BaseModel):
@@ -264,6 +265,7 @@ async def set_source_url_by_relpath(relpath: str, request: SourceURLRequest):
                     ("hash_file", relpath, datetime.now(timezone.utc).isoformat())
                 )
                 await db.commit()
+                QueueWorker.notify()
     
     return SourceURLResponse(
         key=f"relpath:{relpath}",
@@ -355,5 +357,6 @@ async def queue_hash_file(relpath: str):
             ("hash_file", relpath, datetime.now(timezone.utc).isoformat())
         )
         await db.commit()
+    QueueWorker.notify()
     
     return {"status": "queued", "relpath": relpath}
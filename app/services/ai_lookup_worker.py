@@ -11,7 +11,7 @@ from app.config import get_settings
 from app.database import get_db
 from app.websocket import broadcast
 from app.services.ai_lookup_service import call_ai_lookup
-from app.services.url_utils import check_url_sync, filename_matches_url
+from app.services.url_utils import check_url, filename_matches_url
 
 
 class AiLookupWorker:
@@ -144,7 +144,7 @@ class AiLookupWorker:
                 return
 
             await self._append_step(job_id, "Validating candidate URL...", source="system")
-            validation = await asyncio.to_thread(check_url_sync, candidate_url)
+            validation = await check_url(candidate_url)
 
             if not validation.get("ok"):
                 await self._complete_job(
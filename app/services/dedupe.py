@@ -9,6 +9,8 @@ from pydantic import BaseModel
 from app.config import get_settings
 from app.database import get_db
 from app.services.hasher import HasherService
+from app.services.worker import QueueWorker
+from app.utils.paths import norm_relpath
 
 
 class DuplicateFile(BaseModel):
@@ -53,7 +55,8 @@ class DedupeService:
                 (side, config_str, now)
             )
             await db.commit()
-            return cursor.lastrowid
+        QueueWorker.notify()
+        return cursor.lastrowid
             
     async def get_active_scan(self) -> dict | None:
         """Get currently running or pending dedupe scan task."""
@@ -239,7 +242,7 @@ class DedupeService:
                 continue
             if f["relpath"] != keep_by_group[group_id]:
                 root = self._get_root(f["side"])
-                filepath = root / f["relpath"].replace("/", "\\")
+                filepath = root / norm_relpath(f["relpath"])
                 try:
                     filepath.unlink()
                     deleted += 1
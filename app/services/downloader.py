@@ -17,6 +17,7 @@ import requests
 from app.config import get_settings
 from app.database import get_db
 from app.services.source_manager import ModelSource, get_source_manager
+from app.services.worker import QueueWorker
 
 
 def _now_iso() -> str:
@@ -456,6 +457,7 @@ class DownloadManager:
                     ("hash_file", relpath_text, datetime.now(timezone.utc).isoformat()),
                 )
             await db.commit()
+        QueueWorker.notify()
 
     def _post_complete(self, job: DownloadJob) -> None:
         if job.record_source and job.target_root:
@@ -8,6 +8,8 @@ from pydantic import BaseModel
 
 from app.config import get_settings
 from app.database import get_db
+from app.services.worker import QueueWorker
+from app.utils.paths import norm_relpath
 
 
 class QueueTask(BaseModel):
@@ -36,8 +38,8 @@ class QueueService:
 
     def _resolve_move_paths(self, side: str, src_relpath: str, dst_relpath: str) -> tuple[Path, Path]:
         root = self._get_root(side)
-        src_path = root / src_relpath.replace("/", "\\")
-        dst_path = root / dst_relpath.replace("/", "\\")
+        src_path = root / norm_relpath(src_relpath)
+        dst_path = root / norm_relpath(dst_relpath)
         return src_path, dst_path
 
     def _get_move_status(self, side: str, src_relpath: str, dst_relpath: str) -> dict:
@@ -111,7 +113,7 @@ class QueueService:
     
     async def enqueue_copy(self, src_side: str, src_relpath: str, dst_side: str, dst_relpath: str) -> int:
         now = datetime.now(timezone.utc).isoformat()
-        src_path = self._get_root(src_side) / src_relpath.replace("/", "\\")
+        src_path = self._get_root(src_side) / norm_relpath(src_relpath)
         size = src_path.stat().st_size if src_path.exists() else 0
         async with get_db() as db:
             cursor = await db.execute(
@@ -119,7 +121,8 @@ class QueueService:
                 (src_side, src_relpath, dst_side, dst_relpath, size, now)
             )
             await db.commit()
-            return cursor.lastrowid or 0
+        QueueWorker.notify()
+        return cursor.lastrowid or 0
 
     async def enqueue_move(self, side: str, src_relpath: str, dst_relpath: str) -> int:
         task_ids = await self.enqueue_move_batch([side], src_relpath, dst_relpath)
@@ -160,6 +163,7 @@ class QueueService:
                 )
                 task_ids.append(cursor.lastrowid or 0)
             await db.commit()
+        QueueWorker.notify()
         return task_ids
     
     async def enqueue_delete(self, side: str, relpath: str, respect_policy: bool = True) -> int:
@@ -170,7 +174,7 @@ class QueueService:
             if side == "lake" and not settings.lake_allow_delete:
                 raise ValueError("Delete not allowed on Lake")
         now = datetime.now(timezone.utc).isoformat()
-        filepath = self._get_root(side) / relpath.replace("/", "\\")
+        filepath = self._get_root(side) / norm_relpath(relpath)
         size = filepath.stat().st_size if filepath.exists() else 0
         async with get_db() as db:
             cursor = await db.execute(
@@ -178,7 +182,8 @@ class QueueService:
                 (side, relpath, size, now)
             )
             await db.commit()
-            return cursor.lastrowid or 0
+        QueueWorker.notify()
+        return cursor.lastrowid or 0
     
     async def cancel_task(self, task_id: int) -> bool:
         async with get_db() as db:
@@ -81,9 +81,13 @@ class RemoteSessionManager:
         """
         Wait for a pending task. Used by agent long-polling.
         Returns the next pending task or None if timeout.
+
+        An agent parked here is alive, so the poll also counts as a heartbeat
+        (at the start and again when it returns).
         """
         if not self.is_active:
             return None
+        self.heartbeat()
             
         # Check immediate
         next_task = self._get_next_pending()
@@ -97,6 +101,8 @@ class RemoteSessionManager:
             return self._get_next_pending()
         except asyncio.TimeoutError:
             return None
+        finally:
+            self.heartbeat()
 
     def _get_next_pending(self) -> Optional[RemoteTask]:
         """Get the first PENDING task."""
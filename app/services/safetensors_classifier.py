@@ -0,0 +1,748 @@
+"""
+Heuristic model-family classifier for safetensors headers.
+
+Kept free of IO and fully annotated so it can be compiled with mypyc (see
+the opt-in wheel build hook in pyproject.toml); the pure-Python module is
+used whenever no compiled build is installed.
+"""
+
+from __future__ import annotations
+
+import re
+from enum import IntFlag, auto
+from typing import Any, Callable, Container
+
+
+# ---------------------------------------------------------------------------
+# Key signal tables
+#
+# Every literal the classifier looks for in tensor names maps to a bit. A key
+# is matched once against the tables and the hits are OR'ed into a mask.
+# ---------------------------------------------------------------------------
+
+class _Sig(IntFlag):
+    """Signal bits found in tensor names."""
+
+    UNET = auto()
+    VAE = auto()
+    COND = auto()
+    TEXT0 = auto()
+    TEXT1 = auto()
+    COND_STAGE = auto()
+    DOUBLE_BLOCKS = auto()
+    IMG_ATTN = auto()
+    TXT_ATTN = auto()
+    OPENCLIP = auto()
+    CLIP_TEXT = auto()
+    MAIN_IMAGE_ENCODER = auto()
+    MAIN_TEXT_ENCODER = auto()
+    TRANSFORMER_BLOCKS = auto()
+    TRANSFORMER_BLOCKS_ROOT = auto()
+    DIT_BLOCKS = auto()
+    AUDIO_BLOCKS = auto()
+    WAN_BLOCKS = auto()
+    WAN_ATTN = auto()
+    WAN_IMG_ATTN = auto()
+    CAP_EMBEDDER = auto()
+    CONTEXT_REFINER = auto()
+    NOISE_REFINER = auto()
+    ADALN = auto()
+    X_EMBEDDER = auto()
+    INPUT_HINT = auto()
+    ZERO_CONVS = auto()
+    CONTROLNET_PREFIX = auto()
+    CONTROLNET_BLOCKS = auto()
+    CONTROLNET_SINGLE_BLOCKS = auto()
+    CONTROLNET_MODE_EMBEDDER = auto()
+    CONTEXT_EMBEDDER = auto()
+    ADD_EMBEDDING = auto()
+    CONTROLNET_COND_EMBEDDING = auto()
+    LORA_KEYS = auto()
+    LORA_UNET = auto()
+    LORA_TE = auto()
+    LORA_TE1 = auto()
+    LORA_TE2 = auto()
+    LLLITE_PREFIX = auto()
+    T2I_ADAPTER_PREFIX = auto()
+    T2I_BODY_PREFIX = auto()
+    T2I_BLOCKS = auto()
+    T2I_RESNETS = auto()
+    T2I_IN_CONV = auto()
+    FLUX_IMG_MLP = auto()
+    FLUX_TXT_MLP = auto()
+    FLUX_MOD = auto()
+    FLUX_ADD_PROJ = auto()
+
+
+def _int_bits(table: tuple[tuple[Any, _Sig], ...]) -> tuple[tuple[Any, int], ...]:
+    # The scan ORs plain ints: mixing IntFlag into `int | flag` dispatches to
+    # the (much slower) enum operators on every key.
+    return tuple((pattern, int(bits)) for pattern, bits in table)
+
+
+# Prefix-anchored patterns. Nested prefixes carry their parent's bit too.
+_KEY_PREFIXES: tuple[tuple[str, int], ...] = (
+    ("model.diffusion_model.", _Sig.UNET),
+    ("model.diffusion_model.double_blocks.", _Sig.DOUBLE_BLOCKS),
+    ("model.diffusion_model.transformer_blocks.", _Sig.TRANSFORMER_BLOCKS),
+    ("model.diffusion_model.blocks.", _Sig.WAN_BLOCKS),
+    ("conditioner.", _Sig.COND),
+    ("conditioner.embedders.0.", _Sig.TEXT0),
+    ("conditioner.embedders.1.", _Sig.TEXT1),
+    ("conditioner.embedders.0.model.", _Sig.OPENCLIP),
+    ("conditioner.embedders.1.model.", _Sig.OPENCLIP),
+    ("conditioner.embedders.0.transformer.text_model.", _Sig.CLIP_TEXT),
+    ("conditioner.embedders.1.transformer.text_model.", _Sig.CLIP_TEXT),
+    ("conditioner.main_image_encoder.", _Sig.MAIN_IMAGE_ENCODER),
+    ("conditioner.main_text_encoder.", _Sig.MAIN_TEXT_ENCODER),
+    ("first_stage_model.", _Sig.VAE),
+    ("cond_stage_model.", _Sig.COND_STAGE),
+    ("cond_stage_model.transformer.text_model.", _Sig.CLIP_TEXT),
+    ("double_blocks.", _Sig.DOUBLE_BLOCKS),
+    ("transformer_blocks.", _Sig.TRANSFORMER_BLOCKS_ROOT),
+    ("pipe.dit.blocks.", _Sig.DIT_BLOCKS | _Sig.WAN_BLOCKS),
+    ("dit.blocks.", _Sig.DIT_BLOCKS | _Sig.WAN_BLOCKS),
+    ("diffusion_model.blocks.", _Sig.WAN_BLOCKS),
+    ("blocks.", _Sig.WAN_BLOCKS),
+    ("cap_embedder.", _Sig.CAP_EMBEDDER),
+    ("context_refiner.", _Sig.CONTEXT_REFINER),
+    ("noise_refiner.", _Sig.NOISE_REFINER),
+    ("x_embedder.", _Sig.X_EMBEDDER),
+    ("input_hint_block.", _Sig.INPUT_HINT),
+    ("zero_convs.", _Sig.ZERO_CONVS),
+    ("controlnet.", _Sig.CONTROLNET_PREFIX),
+    ("controlnet_blocks.", _Sig.CONTROLNET_BLOCKS),
+    ("controlnet_single_blocks.", _Sig.CONTROLNET_SINGLE_BLOCKS),
+    ("controlnet_mode_embedder.", _Sig.CONTROLNET_MODE_EMBEDDER),
+    ("context_embedder.", _Sig.CONTEXT_EMBEDDER),
+    ("add_embedding.", _Sig.ADD_EMBEDDING),
+    ("controlnet_cond_embedding.", _Sig.CONTROLNET_COND_EMBEDDING),
+    ("adapter.body.", _Sig.T2I_ADAPTER_PREFIX),
+    ("body.", _Sig.T2I_BODY_PREFIX),
+)
+
+# Prefixes that end mid-segment ("lora_unet_down_...") cannot be found by the
+# first-segment lookup and are checked directly.
+_KEY_WORD_PREFIXES: tuple[tuple[str, int], ...] = _int_bits((
+    ("lora_unet_", _Sig.LORA_KEYS | _Sig.LORA_UNET),
+    ("lora_", _Sig.LORA_KEYS),
+    ("lllite_", _Sig.LLLITE_PREFIX),
+))
+_KEY_WORD_PREFIX_HEADS = ("lora_", "lllite_")
+
+
+def _build_prefix_trie(
+    prefixes: tuple[tuple[str, int], ...],
+) -> dict[str, tuple[tuple[tuple[str, ...], int], ...]]:
+    """
+    Group prefixes by their first dotted segment so each key only tests its
+    own family. Prefixes in a family that set the same bits are merged into
+    one tuple, so str.startswith checks them in a single call.
+    """
+    trie: dict[str, dict[int, list[str]]] = {}
+    for prefix, bits in prefixes:
+        family = trie.setdefault(prefix.split(".", 1)[0], {})
+        family.setdefault(int(bits), []).append(prefix)
+    return {
+        head: tuple((tuple(group), bits) for bits, group in family.items())
+        for head, family in trie.items()
+    }
+
+
+_PREFIX_TRIE = _build_prefix_trie(_KEY_PREFIXES)
+
+# Substring patterns, matched anywhere in the key.
+_KEY_SUBSTRINGS: tuple[tuple[str, int], ...] = _int_bits((
+    (".img_attn.", _Sig.IMG_ATTN),
+    (".txt_attn.", _Sig.TXT_ATTN),
+    (".audio_", _Sig.AUDIO_BLOCKS),
+    ("audio_to_video_attn", _Sig.AUDIO_BLOCKS),
+    ("video_to_audio_attn", _Sig.AUDIO_BLOCKS),
+    (".cross_attn.", _Sig.WAN_ATTN),
+    (".adaLN_modulation.", _Sig.ADALN),
+    ("lora_te1", _Sig.LORA_TE1),
+    ("lora_te2", _Sig.LORA_TE2),
+    (".resnets.", _Sig.T2I_RESNETS),
+    (".in_conv.", _Sig.T2I_IN_CONV),
+    (".img_mlp.", _Sig.FLUX_IMG_MLP),
+    (".txt_mlp.", _Sig.FLUX_TXT_MLP),
+    (".img_mod.", _Sig.FLUX_MOD),
+    (".txt_mod.", _Sig.FLUX_MOD),
+    ("add_k_proj", _Sig.FLUX_ADD_PROJ),
+    ("add_q_proj", _Sig.FLUX_ADD_PROJ),
+    ("add_v_proj", _Sig.FLUX_ADD_PROJ),
+    ("to_add_out", _Sig.FLUX_ADD_PROJ),
+))
+
+# Families of literals that share a leading literal compile to one pattern;
+# re's literal-prefix search then beats several separate substring scans.
+# (Alternations without a shared lead are slower in re than plain `in`.)
+_KEY_PATTERNS: tuple[tuple[re.Pattern[str], int], ...] = _int_bits((
+    (re.compile(r"\.[kvq]_img\."), _Sig.WAN_IMG_ATTN),
+    (re.compile(r"\.lora_(?:down|up|A|B)\."), _Sig.LORA_KEYS),
+    (re.compile(r"\.block[12]\."), _Sig.T2I_BLOCKS),
+))
+
+_LORA_TE_BIT = int(_Sig.LORA_TE)
+
+
+# Signal combinations read by the scoring rules
+_DUAL_TEXT = _Sig.TEXT0 | _Sig.TEXT1
+_HUNYUAN_DUAL_ENCODER = _Sig.MAIN_IMAGE_ENCODER | _Sig.MAIN_TEXT_ENCODER
+_ZIT_CORE = _Sig.CAP_EMBEDDER | _Sig.CONTEXT_REFINER | _Sig.ADALN
+_CONTROLNET_FLUX_CORE = _Sig.CONTROLNET_BLOCKS | _Sig.CONTROLNET_SINGLE_BLOCKS | _Sig.CONTEXT_EMBEDDER
+_CONTROLNET_COND = _Sig.CONTROLNET_COND_EMBEDDING | _Sig.ADD_EMBEDDING
+_CONTROLNET_ANY = (
+    _Sig.INPUT_HINT | _Sig.ZERO_CONVS | _Sig.CONTROLNET_PREFIX | _CONTROLNET_COND | _Sig.LLLITE_PREFIX
+)
+_WAN_CORE = _Sig.WAN_BLOCKS | _Sig.WAN_ATTN
+_T2I_BODY_CORE = _Sig.T2I_BODY_PREFIX | _Sig.T2I_BLOCKS
+_T2I_BODY_CONV = _Sig.T2I_RESNETS | _Sig.T2I_IN_CONV
+_LORA_DUAL_TE = _Sig.LORA_TE1 | _Sig.LORA_TE2
+_LORA_FLUX_CORE = _Sig.TRANSFORMER_BLOCKS_ROOT | _Sig.FLUX_ADD_PROJ
+_LORA_FLUX_STREAMS = _Sig.FLUX_IMG_MLP | _Sig.FLUX_TXT_MLP | _Sig.FLUX_MOD
+
+# Ladder rules: each step whose signals are all present sets the score and
+# adds its label. Steps are ordered by increasing score.
+_SDXL_LADDER: tuple[tuple[_Sig, float, str], ...] = (
+    (_DUAL_TEXT, 0.65, "sdxl:dual_text"),
+    (_DUAL_TEXT | _Sig.UNET, 0.78, "sdxl:unet"),
+    (_DUAL_TEXT | _Sig.UNET | _Sig.VAE, 0.92, "sdxl:vae"),
+)
+_SD12_LADDER: tuple[tuple[_Sig, float, str], ...] = (
+    (_Sig.COND_STAGE, 0.6, "sd1:cond_stage"),
+    (_Sig.COND_STAGE | _Sig.UNET, 0.75, "sd1:unet"),
+    (_Sig.COND_STAGE | _Sig.UNET | _Sig.VAE, 0.88, "sd1:vae"),
+)
+_FLUX_LADDER: tuple[tuple[_Sig, float, str], ...] = (
+    (_Sig.DOUBLE_BLOCKS, 0.7, "flux:double_blocks"),
+    (_Sig.DOUBLE_BLOCKS | _Sig.IMG_ATTN | _Sig.TXT_ATTN, 0.9, "flux:img_txt_attn"),
+)
+
+
+def _score_ladder(sig: _Sig, ladder: tuple[tuple[_Sig, float, str], ...]) -> tuple[float, list[str]]:
+    score = 0.0
+    signals: list[str] = []
+    for required, step_score, label in ladder:
+        if required in sig:
+            score = step_score
+            signals.append(label)
+    return score, signals
+
+
+_LORA_TE_CONTEXT = ("text_encoder", "lora_te", "cond_stage_model", "conditioner.embedders")
+
+
+# Relpath and metadata tokens, one pattern per model family. Each relpath
+# pattern is only searched once a cheap literal it requires is present; a
+# combined alternation over the whole path measured ~10x slower than these
+# gated substring tests.
+_RELPATH_WAN22 = re.compile(r"wan2(?:2|_2|\.2|-2)")
+_RELPATH_WAN21 = re.compile(r"wan2(?:1|_1|\.1|-1)")
+_RELPATH_ZIT = re.compile(r"z_image_turbo|z-image-turbo|zimage_turbo|zit")
+_RELPATH_LLLITE = re.compile(r"lllite|controllite")  # also covers "controllllite"
+_META_WAN22 = re.compile(r"wan(?: 2\.2|2\.2|2_2|2-2|22|video22)")
+_META_WAN21 = re.compile(r"wan(?: 2\.1|2\.1|2_1|2-1|21)")
+
+
+def _scan_keys(keys: list[str]) -> tuple[int, list[str], list[str]]:
+    """
+    Return the OR of every signal bit matched by any key, plus the keys whose
+    shapes the classifier probes: ControlNet attn2 to_k weights and LoRA
+    attn1/attn2 to_k down-projections (in key order).
+    """
+    mask = 0
+    controlnet_probe_keys: list[str] = []
+    lora_probe_keys: list[str] = []
+    prefix_trie = _PREFIX_TRIE
+    for k in keys:
+        dot = k.find(".")
+        entries = prefix_trie.get(k if dot == -1 else k[:dot])
+        if entries is not None:
+            for prefix, bits in entries:
+                if k.startswith(prefix):
+                    mask |= bits
+        elif k.startswith(_KEY_WORD_PREFIX_HEADS):
+            for prefix, bits in _KEY_WORD_PREFIXES:
+                if k.startswith(prefix):
+                    mask |= bits
+                    break
+
+        if not mask & _LORA_TE_BIT and "lora" in k and any(ctx in k for ctx in _LORA_TE_CONTEXT):
+            mask |= _LORA_TE_BIT
+
+        if "attn" in k:
+            if ".attn2.to_k.weight" in k:
+                controlnet_probe_keys.append(k)
+            if (
+                ("lora_down" in k or "lora_A" in k)
+                and ("attn2" in k or "attn1" in k)
+                and ("to_k" in k or ".k." in k)
+            ):
+                lora_probe_keys.append(k)
+
+    # Substring signals only need to match somewhere, so test each pattern
+    # once against all keys joined by a separator no pattern contains.
+    blob = "\n".join(keys)
+    for substr, bits in _KEY_SUBSTRINGS:
+        if not mask & bits and substr in blob:
+            mask |= bits
+    for pattern, bits in _KEY_PATTERNS:
+        if not mask & bits and pattern.search(blob):
+            mask |= bits
+    return mask, controlnet_probe_keys, lora_probe_keys
+
+
+def classify_safetensors_header(header: dict[str, Any], relpath: str | None = None) -> dict[str, Any]:
+    """
+    Classify a safetensors header using lightweight heuristics.
+    Returns tags, confidence, and matched signals.
+    """
+    return classify_header_entries(list(header.keys()), header.keys(), header.get, relpath)
+
+
+def classify_header_entries(
+    header_keys: list[str],
+    key_set: Container[str],
+    get_entry: Callable[[str], Any],
+    relpath: str | None,
+) -> dict[str, Any]:
+    """
+    Shared classifier body. `key_set` answers exact-name probes in O(1);
+    `get_entry` returns a single parsed header entry.
+    """
+    keys = [k for k in header_keys if k != "__metadata__"]
+    if not keys:
+        return {"tags": [], "confidence": 0.0, "signals": []}
+    relpath_text = (relpath or "").lower()
+
+    mask, controlnet_probe_keys, lora_probe_keys = _scan_keys(keys)
+    sig = _Sig(mask)
+    controlnet_sdxl_hint = False
+
+    # Shape probe for the ControlNet base model (first valid match wins)
+    controlnet_base_dim: int | None = None
+    for k in controlnet_probe_keys:
+        tensor = get_entry(k)
+        if isinstance(tensor, dict):
+            shape = tensor.get("shape")
+            if isinstance(shape, list) and len(shape) == 2:
+                controlnet_base_dim = shape[1]
+                break
+
+    has_lora_controlnet = "lora_controlnet" in key_set
+
+    add_key = "add_embedding.linear_1.weight"
+    if controlnet_base_dim is None and add_key in key_set:
+        tensor = get_entry(add_key)
+        if isinstance(tensor, dict):
+            shape = tensor.get("shape")
+            if isinstance(shape, list) and len(shape) == 2:
+                controlnet_base_dim = shape[1]
+
+    if controlnet_base_dim and controlnet_base_dim >= 1280:
+        controlnet_sdxl_hint = True
+
+    signals: list[str] = []
+    if _Sig.UNET in sig:
+        signals.append("unet:model.diffusion_model")
+    if _Sig.VAE in sig:
+        signals.append("vae:first_stage_model")
+    if _Sig.TEXT0 in sig:
+        signals.append("text:conditioner.embedders.0")
+    if _Sig.TEXT1 in sig:
+        signals.append("text:conditioner.embedders.1")
+
+    tags: list[dict[str, Any]] = []
+    signals_by_tag: dict[str, list[str]] = {}
+
+    def add_tag(name: str, score: float, tag_signals: list[str]) -> None:
+        if score <= 0:
+            return
+        tags.append({"name": name, "confidence": round(score, 3)})
+        signals_by_tag[name] = tag_signals
+
+    # SDXL (requires dual text encoders), SD1/SD2 (cond_stage_model CLIP) and
+    # Flux-like (double blocks) detection
+    sdxl_score, sdxl_signals = _score_ladder(sig, _SDXL_LADDER)
+    sd12_score, sd12_signals = _score_ladder(sig, _SD12_LADDER)
+    flux_score, flux_signals = _score_ladder(sig, _FLUX_LADDER)
+
+    # SDXL refiner detection (OpenCLIP-only text)
+    sdxl_refiner_score = 0.0
+    sdxl_refiner_signals: list[str] = []
+    if _DUAL_TEXT not in sig and _Sig.OPENCLIP in sig:
+        sdxl_refiner_score = 0.72
+        sdxl_refiner_signals.append("sdxl-refiner:openclip")
+        if _Sig.CLIP_TEXT not in sig:
+            sdxl_refiner_score = 0.82
+            sdxl_refiner_signals.append("sdxl-refiner:no_clip_text")
+        if _Sig.UNET in sig:
+            sdxl_refiner_score = min(0.92, sdxl_refiner_score + 0.08)
+            sdxl_refiner_signals.append("sdxl-refiner:unet")
+        if _Sig.VAE in sig:
+            sdxl_refiner_score = min(0.95, sdxl_refiner_score + 0.03)
+            sdxl_refiner_signals.append("sdxl-refiner:vae")
+
+    # Hunyuan3D detection
+    hunyuan_score = 0.0
+    hunyuan_signals: list[str] = []
+    if sig & _HUNYUAN_DUAL_ENCODER:
+        hunyuan_score = 0.85
+        hunyuan_signals.append("hunyuan:main_encoder")
+        if (_Sig.MAIN_IMAGE_ENCODER | _Sig.MAIN_TEXT_ENCODER) in sig:
+            hunyuan_score = 0.9
+            hunyuan_signals.append("hunyuan:dual_encoder")
+
+    # LTX-2 / AV Transformer detection (audio+video transformer blocks)
+    ltx_score = 0.0
+    ltx_signals: list[str] = []
+    if _Sig.TRANSFORMER_BLOCKS in sig and _Sig.AUDIO_BLOCKS in sig:
+        ltx_score = 0.82
+        ltx_signals.append("ltx:transformer_blocks+audio")
+    elif _Sig.TRANSFORMER_BLOCKS in sig:
+        ltx_score = 0.7
+        ltx_signals.append("ltx:transformer_blocks")
+
+    # Z-Image Turbo (ZIT) detection
+    zit_score = 0.0
+    zit_signals: list[str] = []
+    if _ZIT_CORE in sig:
+        zit_score = 0.8
+        zit_signals.append("zit:cap_embedder+context_refiner+adaln")
+        if _Sig.NOISE_REFINER in sig:
+            zit_score = 0.88
+            zit_signals.append("zit:noise_refiner")
+        if _Sig.X_EMBEDDER in sig:
+            zit_score = min(0.92, zit_score + 0.04)
+            zit_signals.append("zit:x_embedder")
+
+    # Flux ControlNet detection
+    controlnet_flux_score = 0.0
+    controlnet_flux_signals: list[str] = []
+    if _CONTROLNET_FLUX_CORE in sig:
+        controlnet_flux_score = 0.9
+        controlnet_flux_signals.append("controlnet-flux:blocks+context")
+        if _Sig.CONTROLNET_MODE_EMBEDDER in sig:
+            controlnet_flux_score = min(0.94, controlnet_flux_score + 0.04)
+            controlnet_flux_signals.append("controlnet-flux:mode_embedder")
+
+    # ControlNet detection
+    controlnet_score = 0.0
+    controlnet_signals: list[str] = []
+    controlnet_base_score = 0.0
+    controlnet_base_signals: list[str] = []
+    if sig & _CONTROLNET_ANY or controlnet_flux_score > 0:
+        controlnet_score = 0.88
+        controlnet_signals.append("controlnet:input_hint/zero_convs")
+        if _Sig.CONTROLNET_PREFIX in sig:
+            controlnet_score = min(0.95, controlnet_score + 0.05)
+            controlnet_signals.append("controlnet:prefix")
+        if sig & _CONTROLNET_COND:
+            controlnet_score = min(0.95, controlnet_score + 0.04)
+            controlnet_signals.append("controlnet:cond_embedding")
+        if _Sig.LLLITE_PREFIX in sig:
+            controlnet_score = min(0.95, controlnet_score + 0.04)
+            controlnet_signals.append("controlnet:lllite")
+        if controlnet_flux_score > 0:
+            controlnet_score = min(0.95, controlnet_score + 0.04)
+            controlnet_signals.append("controlnet:flux_blocks")
+        if controlnet_base_dim:
+            if controlnet_base_dim == 768:
+                controlnet_base_score = 0.9
+                controlnet_base_signals.append("controlnet-base:sd1(768)")
+            elif controlnet_base_dim == 1024:
+                controlnet_base_score = 0.9
+                controlnet_base_signals.append("controlnet-base:sd2(1024)")
+            elif controlnet_base_dim >= 1280:
+                controlnet_base_score = 0.85
+                controlnet_base_signals.append("controlnet-base:sdxl(>=1280)")
+        elif sig & _CONTROLNET_COND:
+            controlnet_base_score = max(controlnet_base_score, 0.84)
+            controlnet_base_signals.append("controlnet-base:sdxl(add_embedding)")
+        if has_lora_controlnet:
+            controlnet_signals.append("controlnet:lora")
+
+    # WAN 2.x detection
+    wan_base_score = 0.0
+    wan_base_signals: list[str] = []
+    if _WAN_CORE in sig:
+        wan_base_score = 0.78
+        wan_base_signals.append("wan:blocks+cross_attn")
+
+    wan22_score = 0.0
+    wan22_signals: list[str] = []
+    wan21_score = 0.0
+    wan21_signals: list[str] = []
+
+    # T2I-Adapter detection
+    t2i_score = 0.0
+    t2i_signals: list[str] = []
+    if _Sig.T2I_ADAPTER_PREFIX in sig:
+        t2i_score = 0.78
+        t2i_signals.append("t2i:adapter.body")
+    if _T2I_BODY_CORE in sig and sig & _T2I_BODY_CONV:
+        t2i_score = max(t2i_score, 0.72)
+        t2i_signals.append("t2i:body.blocks")
+
+    # Slight boost if metadata explicitly mentions known families
+    meta = get_entry("__metadata__")
+    if isinstance(meta, dict):
+        meta_text = " ".join(str(v).lower() for v in meta.values())
+        if "sdxl" in meta_text and sdxl_score > 0:
+            sdxl_score = min(0.97, sdxl_score + 0.05)
+            sdxl_signals.append("meta:sdxl")
+        if "refiner" in meta_text and sdxl_refiner_score > 0:
+            sdxl_refiner_score = min(0.97, sdxl_refiner_score + 0.05)
+            sdxl_refiner_signals.append("meta:refiner")
+        if ("sd15" in meta_text or "sd1.5" in meta_text or "sd 1.5" in meta_text) and sd12_score > 0:
+            sd12_score = min(0.95, sd12_score + 0.05)
+            sd12_signals.append("meta:sd15")
+        if "flux" in meta_text and flux_score > 0:
+            flux_score = min(0.95, flux_score + 0.05)
+            flux_signals.append("meta:flux")
+        if "hunyuan" in meta_text and hunyuan_score > 0:
+            hunyuan_score = min(0.95, hunyuan_score + 0.05)
+            hunyuan_signals.append("meta:hunyuan")
+        if ltx_score > 0:
+            if "ltx-2" in meta_text or "ltx2" in meta_text or "avtransformer3dmodel" in meta_text:
+                ltx_score = min(0.96, ltx_score + 0.08)
+                ltx_signals.append("meta:ltx2")
+            if "causalvideoautoencoder" in meta_text:
+                ltx_score = min(0.96, ltx_score + 0.04)
+                ltx_signals.append("meta:causal_vae")
+        if ("z image turbo" in meta_text or "z-image turbo" in meta_text or "zit" in meta_text) and zit_score > 0:
+            zit_score = min(0.96, zit_score + 0.05)
+            zit_signals.append("meta:zit")
+        if "controlnet" in meta_text and controlnet_score > 0:
+            controlnet_score = min(0.96, controlnet_score + 0.05)
+            controlnet_signals.append("meta:controlnet")
+        if "wan" in meta_text:
+            if _META_WAN22.search(meta_text):
+                wan22_score = max(wan22_score, 0.9)
+                wan22_signals.append("meta:wan2.2")
+            if _META_WAN21.search(meta_text):
+                wan21_score = max(wan21_score, 0.88)
+                wan21_signals.append("meta:wan2.1")
+
+    add_tag("sdxl", sdxl_score, sdxl_signals)
+    add_tag("sdxl-refiner", sdxl_refiner_score, sdxl_refiner_signals)
+    # Filename/relpath hints for WAN versions
+    if relpath_text:
+        if "wan2" in relpath_text:
+            if _RELPATH_WAN22.search(relpath_text):
+                wan22_score = max(wan22_score, 0.88)
+                wan22_signals.append("path:wan2.2")
+            if _RELPATH_WAN21.search(relpath_text):
+                wan21_score = max(wan21_score, 0.85)
+                wan21_signals.append("path:wan2.1")
+        if ("zit" in relpath_text or "turbo" in relpath_text) and _RELPATH_ZIT.search(relpath_text):
+            zit_score = max(zit_score, 0.86)
+            zit_signals.append("path:zit")
+        if "controlnet" in relpath_text:
+            controlnet_score = max(controlnet_score, 0.9)
+            controlnet_signals.append("path:controlnet")
+        if "lite" in relpath_text and _RELPATH_LLLITE.search(relpath_text):
+            controlnet_score = max(controlnet_score, 0.9)
+            controlnet_signals.append("path:lllite")
+        if "t2i" in relpath_text:
+            t2i_score = max(t2i_score, 0.85)
+            t2i_signals.append("path:t2i")
+        if "adapter" in relpath_text and t2i_score > 0:
+            t2i_score = min(0.9, t2i_score + 0.04)
+            t2i_signals.append("path:adapter")
+        if "openpose" in relpath_text and t2i_score > 0:
+            t2i_score = min(0.92, t2i_score + 0.04)
+            t2i_signals.append("path:openpose")
+        if "xl" in relpath_text and controlnet_score > 0:
+            controlnet_base_score = max(controlnet_base_score, 0.82)
+            controlnet_base_signals.append("path:xl")
+            controlnet_sdxl_hint = True
+
+    # Apply WAN base if version is known or leave generic
+    if wan_base_score > 0:
+        if wan22_score > 0:
+            wan22_score = max(wan22_score, wan_base_score)
+            wan22_signals.extend(wan_base_signals)
+        if wan21_score > 0:
+            wan21_score = max(wan21_score, wan_base_score)
+            wan21_signals.extend(wan_base_signals)
+
+    add_tag("sd1/2", sd12_score, sd12_signals)
+    add_tag("flux", flux_score, flux_signals)
+    add_tag("hunyuan3d", hunyuan_score, hunyuan_signals)
+    add_tag("ltx-2", ltx_score, ltx_signals)
+    add_tag("zit", zit_score, zit_signals)
+    add_tag("controlnet", controlnet_score, controlnet_signals)
+    add_tag("controlnet-lora", 0.85 if has_lora_controlnet else 0.0, ["controlnet:lora"])
+    add_tag("controlnet-sd1", controlnet_base_score if controlnet_base_dim == 768 else 0.0, controlnet_base_signals)
+    add_tag("controlnet-sd2", controlnet_base_score if controlnet_base_dim == 1024 else 0.0, controlnet_base_signals)
+    add_tag("controlnet-sdxl", controlnet_base_score if controlnet_sdxl_hint else 0.0, controlnet_base_signals)
+    add_tag("controlnet-flux", controlnet_flux_score, controlnet_flux_signals)
+    add_tag("t2i-adapter", t2i_score, t2i_signals)
+    add_tag("wan2.2", wan22_score, wan22_signals)
+    add_tag("wan2.1", wan21_score, wan21_signals)
+
+    # ------------------------------------------------------------------
+    # LoRA heuristics (common for safetensors LoRA files)
+    # ------------------------------------------------------------------
+    if _Sig.LORA_KEYS in sig:
+        lora_signals = ["lora:keys"]
+        lora_score = 0.9
+
+        # Try to infer base model family from LoRA tensor shapes
+        lora_ctx_dim: int | None = None
+        lora_rank: int | None = None
+        lora_dtype: str | None = None
+        lora_channel_dim: int | None = None
+
+        # dtype of the first 2D+ tensor (normally the very first key)
+        for k in keys:
+            tensor = get_entry(k)
+            if isinstance(tensor, dict):
+                shape = tensor.get("shape")
+                if isinstance(shape, list) and len(shape) >= 2 and tensor.get("dtype"):
+                    lora_dtype = tensor["dtype"]
+                    break
+
+        for k in lora_probe_keys:
+            tensor = get_entry(k)
+            if not isinstance(tensor, dict):
+                continue
+
+            shape = tensor.get("shape")
+            if not isinstance(shape, list) or len(shape) < 2:
+                continue
+
+            if (
+                "attn2" in k
+                and ("to_k" in k or ".k." in k)
+                and ("lora_down" in k or "lora_A" in k)
+            ):
+                lora_ctx_dim = shape[1]
+                lora_rank = shape[0]
+            if (
+                "attn1" in k
+                and ("to_k" in k or ".k." in k)
+                and ("lora_down" in k or "lora_A" in k)
+            ):
+                lora_channel_dim = shape[1]
+                lora_rank = lora_rank or shape[0]
+
+        lora_base: str | None = None
+        lora_base_score = 0.0
+        lora_base_signals: list[str] = []
+
+        if lora_ctx_dim == 2048:
+            lora_base = "lora-sdxl"
+            lora_base_score = 0.88
+            lora_base_signals.append("lora:ctx=2048")
+        elif lora_ctx_dim == 1024:
+            lora_base = "lora-sd2"
+            lora_base_score = 0.85
+            lora_base_signals.append("lora:ctx=1024")
+        elif lora_ctx_dim == 768:
+            lora_base = "lora-sd1"
+            lora_base_score = 0.85
+            lora_base_signals.append("lora:ctx=768")
+
+        # WAN-style LoRA (video diffusion) detection
+        if not lora_base and _WAN_CORE in sig:
+            # Check for large hidden dim ~5120
+            for k in keys:
+                tensor = get_entry(k)
+                if not isinstance(tensor, dict):
+                    continue
+                shape = tensor.get("shape")
+                if isinstance(shape, list) and len(shape) >= 2 and shape[1] >= 4096:
+                    lora_base = "lora-wan"
+                    lora_base_score = 0.9
+                    lora_base_signals.append("lora:wan_hidden>=4096")
+                    if _Sig.WAN_IMG_ATTN in sig:
+                        lora_base = "lora-wan-i2v"
+                        lora_base_score = 0.92
+                        lora_base_signals.append("lora:wan_img_attn")
+                    break
+
+        # Dual TE LoRA is a strong SDXL signal
+        if not lora_base and _LORA_DUAL_TE in sig:
+            lora_base = "lora-sdxl"
+            lora_base_score = max(lora_base_score, 0.86)
+            lora_base_signals.append("lora:te1+te2")
+
+        # Flux-like LoRA (dual-stream DiT: img/txt MLPs with add_* projections)
+        if (
+            not lora_base
+            and _LORA_FLUX_CORE in sig
+            and sig & _LORA_FLUX_STREAMS
+        ):
+            lora_base = "lora-flux"
+            lora_base_score = max(lora_base_score, 0.84)
+            lora_base_signals.append("lora:flux_transformer")
+
+        # UNet-only LoRA without cross-attn context (ambiguous SD1/SD2 family)
+        if not lora_base and _Sig.LORA_UNET in sig and lora_channel_dim:
+            lora_base = "lora-sd1/2"
+            lora_base_score = max(lora_base_score, 0.72)
+            lora_base_signals.append("lora:unet_only")
+
+        # Metadata hints for LoRA base
+        meta = get_entry("__metadata__")
+        if isinstance(meta, dict):
+            meta_text = " ".join(str(v).lower() for v in meta.values())
+            if "sdxl" in meta_text:
+                lora_base = lora_base or "lora-sdxl"
+                lora_base_score = max(lora_base_score, 0.84)
+                lora_base_signals.append("meta:sdxl")
+            if "sd15" in meta_text or "sd1.5" in meta_text or "sd 1.5" in meta_text:
+                lora_base = lora_base or "lora-sd1"
+                lora_base_score = max(lora_base_score, 0.82)
+                lora_base_signals.append("meta:sd1.5")
+            if "sd2" in meta_text or "sd 2" in meta_text:
+                lora_base = lora_base or "lora-sd2"
+                lora_base_score = max(lora_base_score, 0.8)
+                lora_base_signals.append("meta:sd2")
+            if "wan" in meta_text:
+                lora_base = lora_base or "lora-wan"
+                lora_base_score = max(lora_base_score, 0.86)
+                lora_base_signals.append("meta:wan")
+            if "flux" in meta_text:
+                lora_base = "lora-flux"
+                lora_base_score = max(lora_base_score, 0.9)
+                lora_base_signals.append("meta:flux")
+            if "zimage" in meta_text or "z-image" in meta_text or "z image" in meta_text or "zit" in meta_text:
+                lora_base = "lora-zit"
+                lora_base_score = max(lora_base_score, 0.88)
+                lora_base_signals.append("meta:zimage")
+
+        # Add helpful signals to lora tag
+        if lora_rank:
+            lora_signals.append(f"lora:rank={lora_rank}")
+        if lora_channel_dim:
+            lora_signals.append(f"lora:channel_dim={lora_channel_dim}")
+        if lora_ctx_dim:
+            lora_signals.append(f"lora:ctx_dim={lora_ctx_dim}")
+        if lora_dtype:
+            lora_signals.append(f"lora:dtype={lora_dtype}")
+
+        # Append tags
+        add_tag("lora", lora_score, lora_signals)
+        if _Sig.LORA_TE in sig:
+            add_tag("lora-te", 0.82, ["lora:text_encoder"])
+        if lora_base:
+            add_tag(lora_base, lora_base_score, lora_base_signals)
+
+    tags.sort(key=lambda t: t["confidence"], reverse=True)
+    confidence = tags[0]["confidence"] if tags else 0.0
+
+    # Preserve a flat list of signals for quick debugging
+    signals = []
+    for sigs in signals_by_tag.values():
+        signals.extend(sigs)
+
+    return {
+        "tags": tags,
+        "confidence": confidence,
+        "signals": signals,
+        "signals_by_tag": signals_by_tag,
+    }
@@ -1,10 +1,29 @@
 """Source URL Manager - stores hash -> public URL mappings in SQLite."""
 
+import time
+from collections import OrderedDict
 from typing import Optional, Dict
 from pydantic import BaseModel
 
 from app.database import get_db
 
+# SQL shared by the methods below. sqlite3 caches compiled statements per
+# connection keyed by SQL text, and pooled connections keep that cache warm,
+# so repeat lookups skip the prepare step.
+_SQL_SELECT_BY_KEY = (
+    "SELECT key, url, added_at, notes, filename_hint, relpath FROM source_urls WHERE key = ?"
+)
+_SQL_SELECT_ALL = "SELECT key, url, added_at, notes, filename_hint, relpath FROM source_urls"
+_SQL_UPSERT = """
+    INSERT OR REPLACE INTO source_urls (key, url, added_at, notes, filename_hint, relpath)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+_SQL_DELETE_BY_KEY = "DELETE FROM source_urls WHERE key = ?"
+_SQL_MIGRATE_TO_KEY = """
+    INSERT OR REPLACE INTO source_urls (key, url, added_at, notes, filename_hint, relpath)
+    SELECT ?, url, added_at, notes, filename_hint, NULL FROM source_urls WHERE key = ?
+"""
+
 
 class ModelSource(BaseModel):
     url: str
@@ -14,57 +33,82 @@ class ModelSource(BaseModel):
     relpath: Optional[str] = None  # For unhashed files
 
 
+def _row_to_source(row) -> ModelSource:
+    """
+    Build a ModelSource from a row of _SQL_SELECT_BY_KEY or _SQL_SELECT_ALL.
+
+    Columns come from our own schema, so validation is skipped and the row
+    is read positionally.
+    """
+    return ModelSource.model_construct(
+        url=row[1],
+        added_at=row[2],
+        notes=row[3],
+        filename_hint=row[4],
+        relpath=row[5],
+    )
+
+
+# get_source cache: the UI asks for the same hashes over and over. Writes made
+# through this manager (or reported via invalidate) drop the key; the TTLs
+# bound staleness from writers in other processes. Misses expire sooner so a
+# newly added URL shows up quickly.
+_CACHE_SIZE = 4096
+_CACHE_TTL = 60.0
+_CACHE_MISS_TTL = 10.0
+
+
 class SourceManager:
     """Manages source URL mappings in SQLite database."""
-    
+
+    def __init__(self):
+        self._cache: OrderedDict[str, tuple[float, Optional[ModelSource]]] = OrderedDict()
+
+    def invalidate(self, *keys: str) -> None:
+        """Drop cached lookups for keys changed outside this manager."""
+        for key in keys:
+            self._cache.pop(key, None)
+
     async def get_source(self, file_hash: str) -> Optional[ModelSource]:
-        """Get source URL by hash."""
+        """Get source URL by hash. The returned model is shared; don't mutate it."""
+        cached = self._cache.get(file_hash)
+        if cached is not None and cached[0] > time.monotonic():
+            self._cache.move_to_end(file_hash)
+            return cached[1]
+
         async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT url, added_at, notes, filename_hint, relpath FROM source_urls WHERE key = ?",
-                (file_hash,)
-            )
+            db.row_factory = None  # plain tuples; rows are read positionally
+            cursor = await db.execute(_SQL_SELECT_BY_KEY, (file_hash,))
             row = await cursor.fetchone()
-            if row:
-                return ModelSource(
-                    url=row["url"],
-                    added_at=row["added_at"],
-                    notes=row["notes"],
-                    filename_hint=row["filename_hint"],
-                    relpath=row["relpath"],
-                )
-        return None
+        source = _row_to_source(row) if row else None
+
+        ttl = _CACHE_TTL if source is not None else _CACHE_MISS_TTL
+        self._cache[file_hash] = (time.monotonic() + ttl, source)
+        self._cache.move_to_end(file_hash)
+        if len(self._cache) > _CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return source
 
     async def get_source_by_relpath(self, relpath: str) -> Optional[tuple[str, ModelSource]]:
         """Get source by relpath (for unhashed files). Returns (key, source) tuple."""
         key = f"relpath:{relpath}"
         async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT key, url, added_at, notes, filename_hint, relpath FROM source_urls WHERE key = ?",
-                (key,)
-            )
+            db.row_factory = None
+            cursor = await db.execute(_SQL_SELECT_BY_KEY, (key,))
             row = await cursor.fetchone()
             if row:
-                return (row["key"], ModelSource(
-                    url=row["url"],
-                    added_at=row["added_at"],
-                    notes=row["notes"],
-                    filename_hint=row["filename_hint"],
-                    relpath=row["relpath"],
-                ))
+                return (row[0], _row_to_source(row))
         return None
 
     async def set_source(self, file_hash: str, source: ModelSource):
         """Set or update source URL by hash."""
         async with get_db() as db:
             await db.execute(
-                """
-                INSERT OR REPLACE INTO source_urls (key, url, added_at, notes, filename_hint, relpath)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
+                _SQL_UPSERT,
                 (file_hash, source.url, source.added_at, source.notes, source.filename_hint, source.relpath)
             )
             await db.commit()
+        self.invalidate(file_hash)
 
     async def set_source_by_relpath(self, relpath: str, source: ModelSource):
         """Set source by relpath (for unhashed files)."""
@@ -72,67 +116,48 @@ class SourceManager:
         source.relpath = relpath
         async with get_db() as db:
             await db.execute(
-                """
-                INSERT OR REPLACE INTO source_urls (key, url, added_at, notes, filename_hint, relpath)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
+                _SQL_UPSERT,
                 (key, source.url, source.added_at, source.notes, source.filename_hint, relpath)
             )
             await db.commit()
+        self.invalidate(key)
 
     async def migrate_relpath_to_hash(self, relpath: str, file_hash: str):
         """Migrate a relpath-based entry to hash-based when hash is computed."""
         old_key = f"relpath:{relpath}"
         async with get_db() as db:
-            # Check if relpath-based entry exists
-            cursor = await db.execute(
-                "SELECT url, added_at, notes, filename_hint FROM source_urls WHERE key = ?",
-                (old_key,)
-            )
-            row = await cursor.fetchone()
-            if row:
-                # Insert with new hash key (or update if hash key already exists)
-                await db.execute(
-                    """
-                    INSERT OR REPLACE INTO source_urls (key, url, added_at, notes, filename_hint, relpath)
-                    VALUES (?, ?, ?, ?, ?, NULL)
-                    """,
-                    (file_hash, row["url"], row["added_at"], row["notes"], row["filename_hint"])
-                )
-                # Delete old relpath-based entry
-                await db.execute("DELETE FROM source_urls WHERE key = ?", (old_key,))
+            # Copy the relpath-based entry (if any) to the hash key in one
+            # statement, replacing an existing hash entry
+            cursor = await db.execute(_SQL_MIGRATE_TO_KEY, (file_hash, old_key))
+            if cursor.rowcount:
+                # Delete old relpath-based entry in the same transaction
+                await db.execute(_SQL_DELETE_BY_KEY, (old_key,))
                 await db.commit()
                 print(f"Migrated source URL from relpath to hash: {file_hash[:8]}...")
+        self.invalidate(old_key, file_hash)
 
     async def remove_source(self, file_hash: str):
         """Remove a source URL by hash."""
         async with get_db() as db:
-            await db.execute("DELETE FROM source_urls WHERE key = ?", (file_hash,))
+            await db.execute(_SQL_DELETE_BY_KEY, (file_hash,))
             await db.commit()
+        self.invalidate(file_hash)
 
     async def remove_source_by_relpath(self, relpath: str):
         """Remove a source URL by relpath."""
         key = f"relpath:{relpath}"
         async with get_db() as db:
-            await db.execute("DELETE FROM source_urls WHERE key = ?", (key,))
+            await db.execute(_SQL_DELETE_BY_KEY, (key,))
             await db.commit()
+        self.invalidate(key)
 
     async def get_all_sources(self) -> Dict[str, ModelSource]:
         """Get all source URLs."""
-        result = {}
         async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT key, url, added_at, notes, filename_hint, relpath FROM source_urls"
-            )
-            for row in await cursor.fetchall():
-                result[row["key"]] = ModelSource(
-                    url=row["url"],
-                    added_at=row["added_at"],
-                    notes=row["notes"],
-                    filename_hint=row["filename_hint"],
-                    relpath=row["relpath"],
-                )
-        return result
+            db.row_factory = None
+            cursor = await db.execute(_SQL_SELECT_ALL)
+            rows = await cursor.fetchall()
+        return {row[0]: _row_to_source(row) for row in rows}
 
 
 # Singleton instance
@@ -2,19 +2,45 @@
 
 from __future__ import annotations
 
+import asyncio
 import re
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 from urllib.parse import unquote, unquote_to_bytes, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.config import get_settings
 
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Shared session so back-to-back checks against the same hosts (civitai,
+# huggingface) reuse pooled keep-alive connections instead of paying a TCP and
+# TLS handshake per URL. Only connection failures are retried, not slow reads.
+_session = requests.Session()
+_session.headers["User-Agent"] = _USER_AGENT
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, read=0, backoff_factor=0.2),
+)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+
+# RFC 6266: an extended filename*= takes precedence over a plain filename=
+_CD_FILENAME_STAR_RE = re.compile(r"filename\*\s*=\s*(?:\"([^\"]*)\"|([^;]+))", re.IGNORECASE)
+_CD_FILENAME_RE = re.compile(r"filename\s*=\s*(?:\"([^\"]*)\"|([^;]+))", re.IGNORECASE)
+
 
 def _parse_content_disposition_filename(header_value: str | None) -> Optional[str]:
     if not header_value:
         return None
-    m_star = re.search(r"filename\*\s*=\s*(?:\"([^\"]*)\"|([^;]+))", header_value, flags=re.IGNORECASE)
+    m_star = _CD_FILENAME_STAR_RE.search(header_value)
     if m_star:
         value = (m_star.group(1) or m_star.group(2) or "").strip()
         if "''" in value:
@@ -25,17 +51,42 @@ def _parse_content_disposition_filename(header_value: str | None) -> Optional[st
                 return unquote(encoded)
         return unquote(value)
 
-    m_name = re.search(r"filename\s*=\s*(?:\"([^\"]*)\"|([^;]+))", header_value, flags=re.IGNORECASE)
+    m_name = _CD_FILENAME_RE.search(header_value)
     if m_name:
         return (m_name.group(1) or m_name.group(2) or "").strip()
     return None
 
 
+# Recent check results keyed by URL: the UI and lookup flows re-check the same
+# URLs repeatedly. Failures expire sooner so a fixed URL is picked up quickly.
+_CHECK_CACHE_SIZE = 1024
+_CHECK_CACHE_TTL = 300.0
+_CHECK_CACHE_FAILURE_TTL = 30.0
+_check_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_check_cache_lock = threading.Lock()
+
+
 def check_url_sync(url: str) -> dict:
+    with _check_cache_lock:
+        cached = _check_cache.get(url)
+        if cached is not None and cached[0] > time.monotonic():
+            _check_cache.move_to_end(url)
+            return dict(cached[1])
+
+    result = _check_url_uncached(url)
+
+    ttl = _CHECK_CACHE_TTL if result.get("ok") else _CHECK_CACHE_FAILURE_TTL
+    with _check_cache_lock:
+        _check_cache[url] = (time.monotonic() + ttl, dict(result))
+        _check_cache.move_to_end(url)
+        if len(_check_cache) > _CHECK_CACHE_SIZE:
+            _check_cache.popitem(last=False)
+    return result
+
+
+def _check_url_uncached(url: str) -> dict:
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+        headers = {}
         settings = get_settings()
         host = (urlparse(url).hostname or "").lower()
         if host.endswith("civitai.com") and settings.civitai_api_key:
@@ -43,14 +94,16 @@ def check_url_sync(url: str) -> dict:
         elif (host.endswith("huggingface.co") or host.endswith("hf.co")) and settings.huggingface_api_key:
             headers["Authorization"] = f"Bearer {settings.huggingface_api_key}"
 
-        response = requests.head(url, allow_redirects=True, timeout=10, headers=headers)
+        response = _session.head(url, allow_redirects=True, timeout=10, headers=headers)
 
         # If 404 or other error, or if Content-Length is missing (some sites block HEAD), try GET
         if response.status_code != 200 or not response.headers.get("Content-Length"):
-            response = requests.get(url, stream=True, timeout=10, headers=headers)
+            response = _session.get(url, stream=True, timeout=10, headers=headers)
         elif host.endswith("civitai.com") and not response.headers.get("Content-Disposition"):
             # Some Civitai downloads only include filename on GET
-            response = requests.get(url, stream=True, timeout=10, headers=headers)
+            response = _session.get(url, stream=True, timeout=10, headers=headers)
+        # Only headers are needed; don't leave a streamed GET body open
+        response.close()
 
         size = response.headers.get("Content-Length")
         content_type = response.headers.get("Content-Type", "").lower()
@@ -72,7 +125,36 @@ def check_url_sync(url: str) -> dict:
         return {"ok": False, "error": str(e)}
 
 
+async def check_url(url: str) -> dict:
+    """
+    Async wrapper around check_url_sync.
+
+    The check runs in a worker thread, so the event loop keeps serving other
+    tasks during the round trip and several checks can be awaited together
+    with asyncio.gather.
+    """
+    return await asyncio.to_thread(check_url_sync, url)
+
+
+# Characters that make urlparse split or strip something from the last path
+# segment (query, fragment, ;params, and the tab/newline it discards)
+_URL_BASENAME_SLOW_CHARS = ("?", "#", ";", "\t", "\r", "\n")
+
+
 def url_basename(url: str) -> str:
+    # Fast path for plain "scheme://host/.../name" URLs, the common case
+    scheme_end = url.find("://") if isinstance(url, str) else -1
+    if (
+        scheme_end > 0
+        and url.find("/") == scheme_end + 1
+        and url.find("/", scheme_end + 3) >= 0
+    ):
+        for ch in _URL_BASENAME_SLOW_CHARS:
+            if ch in url:
+                break
+        else:
+            tail = url.rsplit("/", 1)[-1]
+            return unquote(tail) if "%" in tail else tail
     try:
         path = urlparse(url).path
         return unquote(path.rsplit("/", 1)[-1])
@@ -1,18 +1,52 @@
 """Background queue worker for processing file transfers."""
 
 import asyncio
+import errno
+import mmap
+import os
 import shutil
+import time
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Callable
+from typing import Awaitable, Callable
 
 import aiofiles
 import aiofiles.os
+import blake3
 
 from app.config import get_settings
 from app.database import get_db
+from app.services.hasher import compute_hash_mmap_sync
+from app.utils.paths import norm_relpath
 from app.websocket import broadcast
 
+# copy_file_range errors that mean "not supported here" rather than a real
+# I/O failure (old kernels, cross-filesystem copies, some network mounts)
+_COPY_RANGE_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP}
+
+# Files hashed at once by verify tasks; suits SSD/NVMe, lower it for HDDs
+VERIFY_CONCURRENCY = 4
+VERIFY_COMMIT_EVERY = 50
+VERIFY_COMMIT_INTERVAL = 1.0
+
+# Fallback re-check of the queue when no notify() arrives
+IDLE_POLL_INTERVAL = 10.0
+
+# Seconds between copy progress writes/broadcasts
+PROGRESS_INTERVAL = 1.0
+
+# Files up to this size are copied in one shutil.copyfile call (sendfile,
+# fcopyfile or CopyFile2 depending on the OS) with no intermediate progress
+SMALL_COPY_BYTES = 64 * 1024 * 1024
+
+
+def _write_and_hash(fd: int, hasher, data: memoryview) -> None:
+    """Write all of `data` to `fd` and feed it to `hasher` (runs in a thread)."""
+    remaining = data
+    while remaining:
+        remaining = remaining[os.write(fd, remaining):]
+    hasher.update(data)
+
 
 class QueueWorker:
     """Background worker that processes queue tasks."""
@@ -22,6 +56,10 @@ class QueueWorker:
     _paused = False
     _current_task_id = None
     _abort_current_task = False
+    # Set when work may be available, so an idle loop wakes immediately
+    # instead of waiting out a poll interval
+    _wake: asyncio.Event | None = None
+    _loop: asyncio.AbstractEventLoop | None = None
     
     def __init__(self):
         self.settings = get_settings()
@@ -42,12 +80,15 @@ class QueueWorker:
         if QueueWorker._running:
             return
         QueueWorker._running = True
+        QueueWorker._wake = asyncio.Event()
+        QueueWorker._loop = asyncio.get_running_loop()
         print("✓ Queue worker started")
         asyncio.create_task(self._worker_loop())
     
     async def stop(self):
         """Stop the worker loop."""
         QueueWorker._running = False
+        QueueWorker.notify()
         print("Queue worker stopped")
     
     @classmethod
@@ -58,7 +99,26 @@ class QueueWorker:
     @classmethod
     def resume(cls):
         cls._paused = False
+        cls.notify()
         print("Queue worker resumed")
+
+    @classmethod
+    def notify(cls):
+        """Wake the worker loop after enqueueing a task. Safe from any thread."""
+        wake, loop = cls._wake, cls._loop
+        if wake is None or loop is None:
+            return
+        try:
+            in_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            wake.set()
+        else:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # loop already closed
     
     @classmethod
     def is_paused(cls) -> bool:
@@ -76,26 +136,53 @@ class QueueWorker:
         while QueueWorker._running:
             try:
                 if not QueueWorker._paused:
-                    task = await self._get_next_task()
+                    # Clear before looking so an enqueue during the query
+                    # isn't missed
+                    QueueWorker._wake.clear()
+                    task = await self._claim_next_task()
                     if task:
                         await self._process_task(task)
                     else:
-                        # No tasks, wait a bit before checking again
-                        await asyncio.sleep(1)
+                        # No tasks, sleep until one is enqueued
+                        await self._wait_for_wake(IDLE_POLL_INTERVAL)
                 else:
-                    # Paused, check less frequently
-                    await asyncio.sleep(2)
+                    # Paused, wait for resume
+                    QueueWorker._wake.clear()
+                    await self._wait_for_wake(IDLE_POLL_INTERVAL)
             except Exception as e:
                 print(f"Queue worker error: {e}")
                 await asyncio.sleep(5)
     
-    async def _get_next_task(self) -> dict | None:
-        """Get the next pending task from the queue."""
+    @staticmethod
+    async def _wait_for_wake(timeout: float):
+        # The timeout is a safety net for rows that become pending without a
+        # notify() (other processes, manual edits)
+        try:
+            await asyncio.wait_for(QueueWorker._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _claim_next_task(self) -> dict | None:
+        """Mark the next pending task as running and return it."""
         async with get_db() as db:
+            # Select and claim in one statement. The subquery is pinned to the
+            # idx_queue_pending partial index (no scan or sort): without
+            # ANALYZE stats the planner prefers idx_queue_status plus a sort.
             cursor = await db.execute(
-                "SELECT * FROM queue WHERE status = 'pending' ORDER BY created_at ASC LIMIT 1"
+                """
+                UPDATE queue SET status = 'running', started_at = ?
+                WHERE id = (
+                    SELECT id FROM queue INDEXED BY idx_queue_pending
+                    WHERE status = 'pending'
+                    ORDER BY created_at ASC LIMIT 1
+                )
+                RETURNING id, task_type, src_side, src_relpath, dst_side, dst_relpath, verify_folder
+                """,
+                (datetime.now(timezone.utc).isoformat(),)
             )
             row = await cursor.fetchone()
+            await cursor.close()
+            await db.commit()
             if row:
                 return dict(row)
         return None
@@ -107,19 +194,17 @@ class QueueWorker:
         QueueWorker._abort_current_task = False
         
         try:
-            # Mark as running
-            async with get_db() as db:
-                await db.execute(
-                    "UPDATE queue SET status = 'running', started_at = ? WHERE id = ?",
-                    (datetime.now(timezone.utc).isoformat(), task_id)
-                )
-                await db.commit()
-            
+            # Already marked running by _claim_next_task
             # Broadcast status
             await broadcast("task_started", {"task_id": task_id, "task_type": task["task_type"]})
+
+            result = None
+            # (sql, params) an executor wants committed together with the
+            # completed status, so a task ends in a single transaction
+            final_writes: list[tuple[str, tuple]] = []
             
             if task["task_type"] == "copy":
-                await self._execute_copy(task)
+                final_writes = await self._execute_copy(task)
             elif task["task_type"] == "move":
                 await self._execute_move(task)
             elif task["task_type"] == "delete":
@@ -147,12 +232,6 @@ class QueueWorker:
                 # For now we assume dedupe scan is atomic or handles itself, but user said "halt... work in que".
                 # We can update DedupeService later if needed, but for now let's focus on copy/verify.
                 result = await DedupeService().execute_scan(task_id=task_id, side=task["src_side"], mode=mode, min_size_bytes=min_size)
-                
-                await broadcast("task_complete", {
-                    "task_id": task_id, 
-                    "status": "completed", 
-                    "result": result
-                })
             
             # Check if aborted during execution (and wasn't raised as exception)
             if QueueWorker._abort_current_task:
@@ -160,14 +239,17 @@ class QueueWorker:
 
             # Mark as completed
             async with get_db() as db:
+                for sql, params in final_writes:
+                    await db.execute(sql, params)
                 await db.execute(
                     "UPDATE queue SET status = 'completed', completed_at = ? WHERE id = ?",
                     (datetime.now(timezone.utc).isoformat(), task_id)
                 )
                 await db.commit()
             
-            # Broadcast completion with task details for immediate UI update
-            await broadcast("task_complete", {
+            # Broadcast completion with task details for immediate UI update;
+            # dedupe scans also carry their scan stats in "result"
+            payload = {
                 "task_id": task_id, 
                 "status": "completed",
                 "task_type": task["task_type"],
@@ -175,7 +257,10 @@ class QueueWorker:
                 "dst_relpath": task.get("dst_relpath"),
                 "src_side": task.get("src_side"),
                 "dst_side": task.get("dst_side"),
-            })
+            }
+            if result is not None:
+                payload["result"] = result
+            await broadcast("task_complete", payload)
             
         except asyncio.CancelledError:
             # Task was cancelled
@@ -208,108 +293,216 @@ class QueueWorker:
         finally:
             QueueWorker._current_task_id = None
     
-    async def _execute_copy(self, task: dict):
-        """Execute a copy task."""
-        import blake3
-        from datetime import datetime, timezone
-        import time
-        
+    async def _execute_copy(self, task: dict) -> list[tuple[str, tuple]]:
+        """
+        Execute a copy task.
+
+        Returns the queue/file_index writes for _process_task to commit with
+        the completed status.
+        """
         src_root = self._get_root(task["src_side"])
         dst_root = self._get_root(task["dst_side"])
         
-        src_path = src_root / task["src_relpath"].replace("/", "\\")
-        dst_path = dst_root / task["dst_relpath"].replace("/", "\\")
+        src_path = src_root / norm_relpath(task["src_relpath"])
+        dst_path = dst_root / norm_relpath(task["dst_relpath"])
         
-        if not src_path.exists():
-            raise FileNotFoundError(f"Source file not found: {src_path}")
+        # One stat (off the loop; lake roots are often network shares)
+        # serves the existence check, the size and the times copied at the end
+        try:
+            src_stat = await asyncio.to_thread(os.stat, src_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Source file not found: {src_path}") from None
         
         # Create destination directory if needed
         dst_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Get file size for progress
-        file_size = src_path.stat().st_size
-        bytes_copied = 0
+        file_size = src_stat.st_size
         task_id = task["id"]
-        
-        # Hash while copying
-        hasher = blake3.blake3()
-        
-        # Copy with progress and compute hash
-        chunk_size = 1024 * 1024  # 1MB chunks
-        last_db_update_time = 0
-        
-        async with aiofiles.open(src_path, 'rb') as src_file:
-            async with aiofiles.open(dst_path, 'wb') as dst_file:
-                while True:
-                    if QueueWorker._abort_current_task:
-                        # Clean up partial file
-                        try:
-                            dst_path.unlink()
-                        except:
-                            pass
-                        raise asyncio.CancelledError("Task aborted")
-
-                    chunk = await src_file.read(chunk_size)
-                    if not chunk:
-                        break
-                    await dst_file.write(chunk)
-                    hasher.update(chunk)
-                    bytes_copied += len(chunk)
-                    
-                    # Update progress in DB and broadcast
-                    progress_pct = int((bytes_copied / file_size) * 100) if file_size > 0 else 100
-                    
-                    # Throttle DB updates to every 1 second or completion to avoid locking
-                    current_time = time.time()
-                    if current_time - last_db_update_time > 1.0 or bytes_copied == file_size:
-                        async with get_db() as db:
-                            await db.execute(
-                                "UPDATE queue SET bytes_transferred = ? WHERE id = ?",
-                                (bytes_copied, task_id)
-                            )
-                            await db.commit()
-                        last_db_update_time = current_time
-                    
-                    # Broadcast progress (throttled to every 10% or completion)
-                    if (progress_pct % 10 == 0 and progress_pct > 0) or bytes_copied == file_size:
-                        await broadcast("queue_progress", {
-                            "task_id": task_id,
-                            "bytes_transferred": bytes_copied,
-                            "total_bytes": file_size,
-                            "progress_pct": progress_pct,
-                        })
-        
-        # Compute final hash
-        file_hash = hasher.hexdigest()
+        loop = asyncio.get_running_loop()
+        last_progress_ts = loop.time()
+        last_broadcast_pct = -1
+
+        async def report_progress(db, bytes_copied: int):
+            nonlocal last_progress_ts, last_broadcast_pct
+            done = bytes_copied >= file_size
+
+            # DB write and broadcast share one throttle; completion always reports
+            current_ts = loop.time()
+            if not done and current_ts - last_progress_ts < PROGRESS_INTERVAL:
+                return
+            last_progress_ts = current_ts
+
+            # The final count is committed with the completion (final_writes)
+            if not done:
+                await db.execute(
+                    "UPDATE queue SET bytes_transferred = ? WHERE id = ?",
+                    (bytes_copied, task_id)
+                )
+                await db.commit()
+
+            # Nothing new to show clients until the percentage moves
+            progress_pct = int((bytes_copied / file_size) * 100) if file_size > 0 else 100
+            if progress_pct == last_broadcast_pct and not done:
+                return
+            last_broadcast_pct = progress_pct
+            await broadcast("queue_progress", {
+                "task_id": task_id,
+                "bytes_transferred": bytes_copied,
+                "total_bytes": file_size,
+                "progress_pct": progress_pct,
+            })
+
+        # Hold one connection for the whole copy; progress is committed at
+        # most once per PROGRESS_INTERVAL
+        async with get_db() as db:
+            copied = False
+            if file_size <= SMALL_COPY_BYTES:
+                await asyncio.to_thread(shutil.copyfile, src_path, dst_path)
+                await report_progress(db, file_size)
+                copied = True
+            elif hasattr(os, "copy_file_range"):
+                copied = await self._copy_in_kernel(
+                    src_path, dst_path, lambda n: report_progress(db, n)
+                )
+            if copied:
+                # Data never passed through this process, so hash the source
+                # afterwards (mostly from page cache) with multithreaded BLAKE3
+                file_hash = await asyncio.to_thread(compute_hash_mmap_sync, src_path)
+            else:
+                file_hash = await self._copy_and_hash(
+                    src_path, dst_path, lambda n: report_progress(db, n)
+                )
+
         now = datetime.now(timezone.utc).isoformat()
         
         # Preserve file times (sync call is fine, very fast)
-        import os
-        src_stat = src_path.stat()
-        os.utime(dst_path, (src_stat.st_atime, src_stat.st_mtime))
+        os.utime(dst_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
         dst_stat = dst_path.stat()
+        # The hash may come from the source, so the size is what ties it to
+        # the destination
+        if dst_stat.st_size != file_size:
+            raise OSError(
+                errno.EIO,
+                f"Copied {dst_stat.st_size} of {file_size} bytes",
+                str(dst_path),
+            )
         
-        # Update file_index with hash for both source and destination
-        async with get_db() as db:
+        # Final byte count and the hashes for both sides; committed by
+        # _process_task together with the completed status
+        final_writes = [
+            (
+                "UPDATE queue SET bytes_transferred = ? WHERE id = ?",
+                (file_size, task_id),
+            ),
             # Update source file hash
-            await db.execute(
+            (
                 """
                 UPDATE file_index SET hash = ?, hash_computed_at = ?
                 WHERE side = ? AND relpath = ?
                 """,
-                (file_hash, now, task["src_side"], task["src_relpath"])
-            )
+                (file_hash, now, task["src_side"], task["src_relpath"]),
+            ),
             # Update destination file hash
-            await db.execute(
+            (
                 """
                 INSERT OR REPLACE INTO file_index (side, relpath, size, mtime_ns, hash, hash_computed_at, indexed_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
                 """,
-                (task["dst_side"], task["dst_relpath"], dst_stat.st_size, dst_stat.st_mtime_ns, file_hash, now, now)
-            )
-            await db.commit()
+                (task["dst_side"], task["dst_relpath"], dst_stat.st_size, dst_stat.st_mtime_ns, file_hash, now, now),
+            ),
+        ]
         
         print(f"Copied: {task['src_relpath']} → {task['dst_side']} (hash: {file_hash[:8]}...)")
+        return final_writes
+
+    @staticmethod
+    def _abort_copy(dst_path: Path):
+        """Remove the partial destination and cancel the task."""
+        try:
+            dst_path.unlink()
+        except:
+            pass
+        raise asyncio.CancelledError("Task aborted")
+
+    async def _copy_and_hash(
+        self, src_path: Path, dst_path: Path, on_progress: Callable[[int], Awaitable[None]]
+    ) -> str:
+        """
+        Copy through userspace from a read-only memory map, hashing as it goes.
+
+        Each chunk is a view straight into the page cache, written and hashed
+        in a single worker-thread hop without intermediate bytes objects.
+        """
+        hasher = blake3.blake3()
+        chunk_size = 8 * 1024 * 1024  # 8MB per thread hop
+        bytes_copied = 0
+        aborted = False
+
+        with open(src_path, 'rb') as src_file, open(dst_path, 'wb', buffering=0) as dst_file:
+            file_size = os.fstat(src_file.fileno()).st_size
+            if file_size:  # empty files can't be mapped
+                with mmap.mmap(src_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        mapped.madvise(mmap.MADV_SEQUENTIAL)
+                    dst_fd = dst_file.fileno()
+                    while bytes_copied < file_size:
+                        if QueueWorker._abort_current_task:
+                            aborted = True
+                            break
+
+                        n = min(chunk_size, file_size - bytes_copied)
+                        with view[bytes_copied:bytes_copied + n] as chunk:
+                            await asyncio.to_thread(_write_and_hash, dst_fd, hasher, chunk)
+                        bytes_copied += n
+                        await on_progress(bytes_copied)
+
+        # Files are closed by now, so the partial copy can be removed on Windows too
+        if aborted:
+            self._abort_copy(dst_path)
+        return hasher.hexdigest()
+
+    async def _copy_in_kernel(
+        self, src_path: Path, dst_path: Path, on_progress: Callable[[int], Awaitable[None]]
+    ) -> bool:
+        """
+        Copy with os.copy_file_range so the data stays in the kernel.
+
+        Returns False, before any data is written, when the kernel or the
+        filesystem pair doesn't support it; the caller falls back to
+        _copy_and_hash. Some filesystems (FUSE, network mounts, procfs-like)
+        report that by copying 0 bytes at offset 0 rather than by failing.
+        """
+        chunk_size = 16 * 1024 * 1024  # 16MB per call keeps progress/abort responsive
+        bytes_copied = 0
+
+        with open(src_path, 'rb') as src_file, open(dst_path, 'wb') as dst_file:
+            src_fd, dst_fd = src_file.fileno(), dst_file.fileno()
+            src_size = os.fstat(src_fd).st_size
+            while True:
+                if QueueWorker._abort_current_task:
+                    self._abort_copy(dst_path)
+
+                try:
+                    n = await asyncio.to_thread(os.copy_file_range, src_fd, dst_fd, chunk_size)
+                except OSError as e:
+                    if bytes_copied == 0 and e.errno in _COPY_RANGE_UNSUPPORTED:
+                        return False
+                    raise
+                if n == 0:
+                    if bytes_copied == 0 and src_size > 0:
+                        return False
+                    if bytes_copied < src_size:
+                        raise OSError(
+                            errno.EIO,
+                            f"copy_file_range stopped at {bytes_copied} of {src_size} bytes",
+                            str(dst_path),
+                        )
+                    break
+                bytes_copied += n
+                await on_progress(bytes_copied)
+
+        return True
 
     async def _execute_move(self, task: dict):
         """Execute a move task within a side."""
@@ -320,8 +513,8 @@ class QueueWorker:
         if src_root != dst_root:
             raise ValueError("Move must be within the same side")
 
-        src_path = src_root / task["src_relpath"].replace("/", "\\")
-        dst_path = dst_root / task["dst_relpath"].replace("/", "\\")
+        src_path = src_root / norm_relpath(task["src_relpath"])
+        dst_path = dst_root / norm_relpath(task["dst_relpath"])
 
         if not src_path.exists():
             raise FileNotFoundError(f"Source file not found: {src_path}")
@@ -384,12 +577,15 @@ class QueueWorker:
             )
             await db.commit()
 
+        from app.services.source_manager import get_source_manager
+        get_source_manager().invalidate(old_key, new_key)
+
         print(f"Moved: {task['src_relpath']} → {task['dst_relpath']} ({task['src_side']})")
     
     async def _execute_delete(self, task: dict):
         """Execute a delete task."""
         root = self._get_root(task["dst_side"])
-        filepath = root / task["dst_relpath"].replace("/", "\\")
+        filepath = root / norm_relpath(task["dst_relpath"])
         
         if not filepath.exists():
             print(f"File already deleted: {filepath}")
@@ -400,8 +596,6 @@ class QueueWorker:
 
     async def _execute_verify(self, task: dict):
         """Execute a verification task."""
-        import blake3
-        
         task_id = task["id"]
         relpath = task["src_relpath"]  # We reuse src_relpath for specific file
         folder = task["verify_folder"] # We added this column
@@ -489,95 +683,111 @@ class QueueWorker:
             
             candidate_files = await cursor.fetchall()
         
-        # Process files
+        # Process files, several at a time: hashing runs in threads that
+        # release the GIL, so disk reads and SIMD work overlap across files
         verified_count = 0
-        
-        for i, row in enumerate(candidate_files):
-            # Check for cancellation
-            if not QueueWorker._running or QueueWorker._abort_current_task: 
-                break
-                
+        sem = asyncio.Semaphore(VERIFY_CONCURRENCY)
+
+        async def verify_one(row) -> tuple[str, list[tuple[str, str]] | None]:
+            """Hash the missing sides of one file; None means skipped or failed."""
             file_relpath = row["relpath"]
-            local_path = self.settings.local_models_root / file_relpath.replace("/", "\\")
-            lake_path = self.settings.lake_models_root / file_relpath.replace("/", "\\")
-            
-            # Broadcast verify progress (reusing fields creatively or adding custom payload)
-            # We can use 'queue_progress' but UI needs to interpret it.
-            # verify_folder logic in UI expects 'verify_progress' event
-            if folder:
-                await broadcast("verify_progress", {
-                    "folder": folder,
-                    "current": i + 1,
-                    "total": total_files,
-                    "relpath": file_relpath
-                })
+            async with sem:
+                # Check for cancellation
+                if not QueueWorker._running or QueueWorker._abort_current_task:
+                    return file_relpath, None
 
-            # Update queue progress
-            async with get_db() as db:
-                await db.execute(
-                    "UPDATE queue SET bytes_transferred = ? WHERE id = ?",
-                    (i + 1, task_id)
-                )
-                await db.commit()
-                
-            await broadcast("queue_progress", {
-                "task_id": task_id,
-                "bytes_transferred": i + 1,
-                "total_bytes": total_files,
-                "progress_pct": int(((i + 1) / total_files) * 100) if total_files > 0 else 100,
-            })
-            
-            try:
-                local_hash = row["local_hash"]
-                lake_hash = row["lake_hash"]
-                now = datetime.now(timezone.utc).isoformat()
-                updates = []
-                
-                if not local_hash and local_path.exists():
-                    hasher = blake3.blake3()
-                    async with aiofiles.open(local_path, 'rb') as f:
-                        while chunk := await f.read(1024 * 1024):
-                            hasher.update(chunk)
-                    local_hash = hasher.hexdigest()
-                    updates.append(("local", local_hash))
-                
-                if not lake_hash and lake_path.exists():
-                    hasher = blake3.blake3()
-                    async with aiofiles.open(lake_path, 'rb') as f:
-                        while chunk := await f.read(1024 * 1024):
-                            hasher.update(chunk)
-                    lake_hash = hasher.hexdigest()
-                    updates.append(("lake", lake_hash))
-                
-                if updates:
-                    async with get_db() as db:
+                local_path = self.settings.local_models_root / norm_relpath(file_relpath)
+                lake_path = self.settings.lake_models_root / norm_relpath(file_relpath)
+                try:
+                    local_hash = row["local_hash"]
+                    lake_hash = row["lake_hash"]
+
+                    # Hash whichever sides are missing, both at once when needed
+                    pending = []
+                    if not local_hash and local_path.exists():
+                        pending.append(("local", local_path))
+                    if not lake_hash and lake_path.exists():
+                        pending.append(("lake", lake_path))
+                    hashes = await asyncio.gather(*(
+                        asyncio.to_thread(compute_hash_mmap_sync, path) for _, path in pending
+                    ))
+                    return file_relpath, [(side, h) for (side, _), h in zip(pending, hashes)]
+
+                except Exception as e:
+                    print(f"Failed to verify {file_relpath}: {e}")
+                    return file_relpath, None
+
+        # Results and progress go through one connection and are committed
+        # every VERIFY_COMMIT_EVERY files or VERIFY_COMMIT_INTERVAL seconds,
+        # instead of two commits per file. SQLite holds the write lock until
+        # the commit, so pending writes are also committed whenever the next
+        # file takes longer than the interval to finish.
+        last_commit_time = time.monotonic()
+        # Timestamp for hash_computed_at, refreshed per commit batch rather
+        # than formatted for every file
+        now = datetime.now(timezone.utc).isoformat()
+        async with get_db() as db:
+            # Progress is reported in completion order
+            for i, next_done in enumerate(asyncio.as_completed([verify_one(row) for row in candidate_files])):
+                next_done = asyncio.ensure_future(next_done)
+                while not (await asyncio.wait({next_done}, timeout=VERIFY_COMMIT_INTERVAL))[0]:
+                    if db.in_transaction:
+                        await db.commit()
+                        last_commit_time = time.monotonic()
+                        now = datetime.now(timezone.utc).isoformat()
+                file_relpath, updates = next_done.result()
+                if updates is not None:
+                    verified_count += 1
+                    if updates:
                         for side, h in updates:
                             await db.execute(
                                 "UPDATE file_index SET hash = ?, hash_computed_at = ? WHERE side = ? AND relpath = ?",
                                 (h, now, side, file_relpath)
                             )
-                        await db.commit()
-                
-                verified_count += 1
-                    
-            except Exception as e:
-                print(f"Failed to verify {file_relpath}: {e}")
-                continue
-        
+                if not QueueWorker._running or QueueWorker._abort_current_task:
+                    continue
+
+                # Broadcast verify progress (reusing fields creatively or adding custom payload)
+                # We can use 'queue_progress' but UI needs to interpret it.
+                # verify_folder logic in UI expects 'verify_progress' event
+                if folder:
+                    await broadcast("verify_progress", {
+                        "folder": folder,
+                        "current": i + 1,
+                        "total": total_files,
+                        "relpath": file_relpath
+                    })
+
+                # Update queue progress
+                await db.execute(
+                    "UPDATE queue SET bytes_transferred = ? WHERE id = ?",
+                    (i + 1, task_id)
+                )
+                current_time = time.monotonic()
+                if (i + 1) % VERIFY_COMMIT_EVERY == 0 or current_time - last_commit_time > VERIFY_COMMIT_INTERVAL:
+                    await db.commit()
+                    last_commit_time = current_time
+                    now = datetime.now(timezone.utc).isoformat()
+
+                await broadcast("queue_progress", {
+                    "task_id": task_id,
+                    "bytes_transferred": i + 1,
+                    "total_bytes": total_files,
+                    "progress_pct": int(((i + 1) / total_files) * 100) if total_files > 0 else 100,
+                })
+            await db.commit()
+
         print(f"Verification complete: {verified_count}/{total_files} files")
 
     async def _execute_hash_file(self, task: dict):
         """Execute a single file hash task."""
-        import blake3
-        import time
-        
         relpath = task["src_relpath"]
         task_id = task["id"]
         
         print(f"Hashing file: {relpath}")
         
-        local_path = self.settings.local_models_root / relpath.replace("/", "\\")
-        lake_path = self.settings.lake_models_root / relpath.replace("/", "\\")
+        local_path = self.settings.local_models_root / norm_relpath(relpath)
+        lake_path = self.settings.lake_models_root / norm_relpath(relpath)
         
         now = datetime.now(timezone.utc).isoformat()
         computed_hash = None
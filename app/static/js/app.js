@@ -65,6 +65,11 @@ const App = {
             case 'ai_lookup_update':
                 this.loadAiLookupJobs();
                 break;
+            case 'resync':
+                // Server dropped our backlog; reload state instead of replaying it
+                this.loadQueueTasks();
+                this.loadAiLookupJobs();
+                break;
         }
         // Dispatch custom event for page-specific handlers
         document.dispatchEvent(new CustomEvent('ws:' + msg.type, { detail: msg.data }));
@@ -156,6 +156,13 @@ const Sync = {
             App.loadQueueTasks();
         });
 
+        // Missed events: rebuild queue state and the diff from the API
+        document.addEventListener('ws:resync', async () => {
+            await this.loadQueueState();
+            this.updateRowQueueStatus();
+            this.refreshDiff();
+        });
+
     },
 
     updateRowQueueStatus() {
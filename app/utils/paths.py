@@ -0,0 +1,12 @@
+"""
+Helpers for turning stored relpaths into filesystem paths.
+"""
+
+import functools
+from pathlib import Path
+
+
+@functools.lru_cache(maxsize=1024)
+def norm_relpath(relpath: str) -> Path:
+    """Turn a stored relpath (either separator) into a relative OS path."""
+    return Path(*(part for part in relpath.replace("\\", "/").split("/") if part))
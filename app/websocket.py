@@ -2,68 +2,122 @@
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import asyncio
+import itertools
 import json
 import logging
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:  # optional speedup, installed with the "speedups" extra
+    orjson = None
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Connected clients and their per-client send locks. A transfer can trigger
-# broadcasts from several async tasks; Starlette/Uvicorn expects writes to a
-# single WebSocket to be serialized.
-_clients: dict[WebSocket, asyncio.Lock] = {}
-_clients_lock = asyncio.Lock()
+# Progress events: only the newest pending message per task is worth sending,
+# so a slow client gets them coalesced instead of queued up.
+COALESCED_EVENTS = frozenset({"queue_progress", "verify_progress"})
 
+# Pending messages per client before the backlog is replaced by a single
+# "resync" event telling the page to reload its state from the API.
+CLIENT_BACKLOG_LIMIT = 1000
 
-async def _add_client(websocket: WebSocket) -> None:
-    async with _clients_lock:
-        _clients[websocket] = asyncio.Lock()
 
+class _ClientOutbox:
+    """Pending messages for one client.
 
-async def _remove_client(websocket: WebSocket) -> None:
-    async with _clients_lock:
-        _clients.pop(websocket, None)
+    Progress messages are keyed by (event type, task_id), so a newer update
+    replaces the pending one in place. Every other event gets its own key and
+    is never dropped; if the backlog still grows past CLIENT_BACKLOG_LIMIT the
+    client is told to resync rather than silently losing state transitions.
+    """
 
+    def __init__(self) -> None:
+        self._pending: OrderedDict[object, str] = OrderedDict()
+        self._ready = asyncio.Event()
+        self._seq = itertools.count()
 
-async def broadcast(event_type: str, data: dict):
-    """Broadcast an event to all connected clients."""
-    message = json.dumps({"type": event_type, "data": data})
+    def put(self, event_type: str, data: dict, message: str) -> None:
+        if event_type in COALESCED_EVENTS and data.get("task_id") is not None:
+            key = (event_type, data["task_id"])
+        else:
+            key = next(self._seq)
+        if key not in self._pending and len(self._pending) >= CLIENT_BACKLOG_LIMIT:
+            logger.warning("WebSocket client is too far behind; asking it to resync")
+            self._pending.clear()
+            key = next(self._seq)
+            message = _encode("resync", {})
+        self._pending[key] = message
+        self._ready.set()
+
+    async def get(self) -> str:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        _, message = self._pending.popitem(last=False)
+        return message
+
+
+# Connected clients and their outboxes. Each socket has a single writer task
+# draining its outbox, so writes to one WebSocket stay serialized and a slow
+# client never holds up broadcast() or other clients.
+_clients: dict[WebSocket, _ClientOutbox] = {}
+
+
+async def _client_writer(websocket: WebSocket, outbox: _ClientOutbox) -> None:
+    """Send pending messages to one client until it goes away."""
+    try:
+        while True:
+            message = await outbox.get()
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    except RuntimeError as exc:
+        logger.debug("Dropping closed WebSocket client: %s", exc)
+    except Exception:
+        logger.exception("Dropping WebSocket client after broadcast failure")
+    finally:
+        _clients.pop(websocket, None)
 
-    async with _clients_lock:
-        clients = list(_clients.items())
 
-    disconnected: list[WebSocket] = []
-    for client, send_lock in clients:
+def _encode(event_type: str, data: dict) -> str:
+    """Serialize an event once, compactly, for every client."""
+    payload = {"type": event_type, "data": data}
+    if orjson is not None:
         try:
-            async with send_lock:
-                await client.send_text(message)
-        except WebSocketDisconnect:
-            disconnected.append(client)
-        except RuntimeError as exc:
-            logger.debug("Dropping closed WebSocket client: %s", exc)
-            disconnected.append(client)
-        except Exception:
-            logger.exception("Dropping WebSocket client after broadcast failure")
-            disconnected.append(client)
-
-    if disconnected:
-        async with _clients_lock:
-            for client in disconnected:
-                _clients.pop(client, None)
+            return orjson.dumps(payload).decode()
+        except TypeError:
+            pass  # e.g. non-str keys; let the stdlib handle (or reject) it
+    return json.dumps(payload, separators=(",", ":"))
+
+
+async def broadcast(event_type: str, data: dict):
+    """Broadcast an event to all connected clients (never waits on a send)."""
+    if not _clients:
+        return
+    message = _encode(event_type, data)
+
+    for outbox in list(_clients.values()):
+        outbox.put(event_type, data, message)
 
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for realtime updates."""
     await websocket.accept()
-    await _add_client(websocket)
+    outbox = _ClientOutbox()
+    _clients[websocket] = outbox
+    writer = asyncio.create_task(_client_writer(websocket, outbox))
 
     try:
         while True:
             # Keep connection alive, handle incoming messages if needed
             await websocket.receive_text()
     except WebSocketDisconnect:
-        await _remove_client(websocket)
+        pass
     except Exception:
         logger.exception("WebSocket connection failed")
-        await _remove_client(websocket)
+    finally:
+        _clients.pop(websocket, None)
+        writer.cancel()
@@ -2,6 +2,7 @@
 # requires-python = ">=3.11"
 # dependencies = [
 #     "requests",
+#     "blake3>=0.4.1",
 # ]
 # ///
 
@@ -28,13 +29,20 @@ import os
 import sys
 import time
 import json
+import gzip
 import socket
 import platform
 import subprocess
+import collections
+import functools
+import itertools
 import hashlib
 import threading
+import queue
+import random
 import re
 import shutil
+import shlex
 import configparser
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
@@ -60,7 +68,7 @@ PROMPT_OPTIONAL_KEYS = os.environ.get("PROMPT_OPTIONAL_KEYS", "1").strip().lower
 CREATE_COMFY_DIR = os.environ.get("CREATE_COMFY_DIR", "0").strip().lower() in {"1", "true", "yes", "y"}
 TORCH_INDEX_URL = os.environ.get("TORCH_INDEX_URL", "").strip()
 TORCH_INDEX_FLAG = os.environ.get("TORCH_INDEX_FLAG", "--extra-index-url").strip()
-TORCH_PACKAGES = os.environ.get("TORCH_PACKAGES", "torch torchvision torchaudio").split()
+TORCH_PACKAGES = shlex.split(os.environ.get("TORCH_PACKAGES", "torch torchvision torchaudio"))
 DOWNLOAD_MAX_RETRIES = max(1, int(os.environ.get("DOWNLOAD_MAX_RETRIES", "3")))
 DOWNLOAD_RETRY_BACKOFF_SECONDS = max(0.0, float(os.environ.get("DOWNLOAD_RETRY_BACKOFF_SECONDS", "2")))
 EXTRA_PIP_PACKAGES = [p for p in os.environ.get("EXTRA_PIP_PACKAGES", "sageattention triton").split() if p]
@@ -69,11 +77,13 @@ TRANSFORMERS_COMPAT_PIN = os.environ.get("TRANSFORMERS_COMPAT_PIN", "transformer
 LIGHTNING_KEEPALIVE = os.environ.get("LIGHTNING_KEEPALIVE", "1").strip().lower() in {"1", "true", "yes", "y"}
 KEEPALIVE_INTERVAL_SECONDS = max(10.0, float(os.environ.get("KEEPALIVE_INTERVAL_SECONDS", "45")))
 KEEPALIVE_BURST_SECONDS = max(0.5, float(os.environ.get("KEEPALIVE_BURST_SECONDS", "3")))
-DOWNLOAD_CHUNK_MIB = env_int("DOWNLOAD_CHUNK_MIB", 1, minimum=1)
+DOWNLOAD_CHUNK_MIB = env_int("DOWNLOAD_CHUNK_MIB", 4, minimum=1)
 PROGRESS_UPDATE_INTERVAL_SECONDS = max(0.1, float(os.environ.get("PROGRESS_UPDATE_INTERVAL_SECONDS", "0.25")))
 PROGRESS_POST_TIMEOUT_SECONDS = max(1.0, float(os.environ.get("PROGRESS_POST_TIMEOUT_SECONDS", "5")))
 DOWNLOAD_SEGMENTS = env_int("DOWNLOAD_SEGMENTS", 4, minimum=1)
 DOWNLOAD_SEGMENT_MIN_MIB = env_int("DOWNLOAD_SEGMENT_MIN_MIB", 64, minimum=1)
+DOWNLOAD_SOCKET_RCVBUF_KIB = env_int("DOWNLOAD_SOCKET_RCVBUF_KIB", 0, minimum=0)
+DOWNLOAD_PREALLOCATE = os.environ.get("DOWNLOAD_PREALLOCATE", "1").strip().lower() in {"1", "true", "yes", "y"}
 DOWNLOAD_BATCH_WORKERS = env_int("DOWNLOAD_BATCH_WORKERS", 3, minimum=1)
 LOCAL_DOWNLOAD_WORKERS = env_int("LOCAL_DOWNLOAD_WORKERS", 1, minimum=1)
 HF_DOWNLOAD_WORKERS = env_int("HF_DOWNLOAD_WORKERS", 1, minimum=1)
@@ -83,8 +93,21 @@ BASE_HOST = urlparse(BASE_URL).netloc.lower()
 
 # --- CONSTANTS ---
 USER_AGENT = "ComfyRemoteAgent/0.1"
+IS_WINDOWS = platform.system().lower().startswith("win")
 CHUNK_SIZE = DOWNLOAD_CHUNK_MIB * 1024 * 1024
 STALL_TIMEOUT = 45
+# The server holds /tasks/next for up to 20s; allow for that plus slack
+TASK_POLL_TIMEOUT = 30
+# Cap on the backoff after polls that return at once (no session, errors)
+POLL_BACKOFF_MAX_SECONDS = 30.0
+# Progress bodies above this size (batch items_status maps) are gzipped
+PROGRESS_GZIP_MIN_BYTES = 1024
+# Chunks that may wait in memory for the disk while the next ones are received
+DOWNLOAD_WRITE_QUEUE_CHUNKS = env_int("DOWNLOAD_WRITE_QUEUE_CHUNKS", 4, minimum=1)
+# How often segmented downloads fsync and record per-range progress
+SEGMENT_STATE_SAVE_SECONDS = 5.0
+# Single-stream downloads at least this large are preallocated up front
+PREALLOCATE_MIN_BYTES = 128 * 1024 * 1024
 NATIVE_MANAGER_CONFIG_DEFAULTS = {
     "git_exe": "",
     "use_uv": "True",
@@ -112,28 +135,103 @@ DEFAULT_COMFY_DIR = "ComfyUI"
 
 # --- IMPORTS ---
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import blake3
+except ImportError:  # downloads are then saved without hash verification
+    blake3 = None
 
 # Lightning workspaces can use overlay/symlinked filesystems and preloaded user
 # site packages. Prefer real venv files and isolate from ambient user packages.
 os.environ.setdefault("UV_LINK_MODE", "copy")
 os.environ.setdefault("PYTHONNOUSERSITE", "1")
 
+class SocketOptionsAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections use `socket_options` (None: urllib3 defaults)."""
+
+    def __init__(self, socket_options=None, **kwargs):
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+def download_socket_options():
+    # urllib3 already sets TCP_NODELAY; keep it when adding our own options.
+    options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+    if DOWNLOAD_SOCKET_RCVBUF_KIB:
+        # Opt-in: a fixed SO_RCVBUF turns off Linux receive-window autotuning
+        # and is clamped to net.core.rmem_max, so only set it when asked.
+        options.append((socket.SOL_SOCKET, socket.SO_RCVBUF, DOWNLOAD_SOCKET_RCVBUF_KIB * 1024))
+    return options
+
+def mount_pooled_adapter(session, pool_maxsize, retry_statuses=(), socket_options=None):
+    # Keep enough idle keep-alive connections for every thread sharing the
+    # session. Connection setup is always retried; `retry_statuses` are retried
+    # for idempotent methods only, and the last response is returned as-is.
+    # Download sessions pass none: HTTP errors and broken bodies go through
+    # the download retry/resume logic instead.
+    adapter = SocketOptionsAdapter(
+        socket_options=socket_options,
+        pool_connections=8,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=3,
+            connect=3,
+            read=0,
+            status=3 if retry_statuses else 0,
+            status_forcelist=retry_statuses,
+            backoff_factor=0.3,
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
 api_session = requests.Session()
 api_session.headers.update({
     "Authorization": f"Bearer {API_KEY}",
     "User-Agent": USER_AGENT
 })
-
-download_session = requests.Session()
-download_session.headers.update({
-    "User-Agent": USER_AGENT
-})
+# Task polls and cancel checks ride out brief 502-504s from the tunnel/proxy
+mount_pooled_adapter(api_session, 4, retry_statuses=(502, 503, 504))
+
+def make_download_session():
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        # Ask for the bytes as stored so bodies can be read raw (see iter_raw_chunks).
+        "Accept-Encoding": "identity",
+    })
+    # Parallel range segments share the session, so size the pool for them
+    mount_pooled_adapter(session, max(16, DOWNLOAD_SEGMENTS * 2), socket_options=download_socket_options())
+    return session
+
+download_session = make_download_session()
+
+# Batch download sessions per provider, kept across tasks so later files to
+# the same hosts reuse warm keep-alive connections instead of new TLS setups.
+_provider_sessions = {}
+_provider_sessions_lock = threading.Lock()
+
+def get_download_session(provider):
+    with _provider_sessions_lock:
+        session = _provider_sessions.get(provider)
+        if session is None:
+            session = _provider_sessions[provider] = make_download_session()
+        return session
 
 _api_lock = threading.Lock()
 _keepalive_active = threading.Event()
 _progress_lock = threading.Lock()
 _progress_event = threading.Event()
 _progress_pending = {}
+# Cleared if the app turns out not to accept gzip-encoded progress bodies
+_progress_gzip = True
 _progress_terminal_tasks = set()
 _progress_reporter_started = False
 
@@ -386,7 +484,7 @@ def fetch_remote_provider_keys():
 
 def get_next_task():
     try:
-        resp = api_session.get(f"{BASE_URL}/api/remote/tasks/next")
+        resp = api_session.get(f"{BASE_URL}/api/remote/tasks/next", timeout=TASK_POLL_TIMEOUT)
         if resp.status_code == 200:
             return resp.json() # Returns Task or None
         return None
@@ -399,13 +497,27 @@ def post_progress_payload(payload):
         with _progress_lock:
             if payload.get("task_id") in _progress_terminal_tasks:
                 return
+    global _progress_gzip
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    headers = {"Content-Type": "application/json"}
+    gzipped = _progress_gzip and len(body) > PROGRESS_GZIP_MIN_BYTES
     try:
         with _api_lock:
-            api_session.post(
+            resp = api_session.post(
                 f"{BASE_URL}/api/remote/tasks/progress",
-                json=payload,
+                data=gzip.compress(body, compresslevel=5) if gzipped else body,
+                headers={**headers, "Content-Encoding": "gzip"} if gzipped else headers,
                 timeout=PROGRESS_POST_TIMEOUT_SECONDS,
             )
+            if gzipped and resp.status_code in (400, 415, 422):
+                # Older app without gzip request bodies: stop compressing
+                _progress_gzip = False
+                api_session.post(
+                    f"{BASE_URL}/api/remote/tasks/progress",
+                    data=body,
+                    headers=headers,
+                    timeout=PROGRESS_POST_TIMEOUT_SECONDS,
+                )
     except Exception:
         pass
 
@@ -416,9 +528,16 @@ def start_progress_reporter():
     _progress_reporter_started = True
 
     def loop():
+        last_post = 0.0
         while True:
             _progress_event.wait(timeout=PROGRESS_UPDATE_INTERVAL_SECONDS)
+            # Post at most once per interval so bursts (e.g. many batch
+            # items finishing together) collapse into one request.
+            wait_s = last_post + PROGRESS_UPDATE_INTERVAL_SECONDS - time.monotonic()
+            if wait_s > 0:
+                time.sleep(wait_s)
             _progress_event.clear()
+            last_post = time.monotonic()
             with _progress_lock:
                 pending = list(_progress_pending.values())
                 _progress_pending.clear()
@@ -427,6 +546,21 @@ def start_progress_reporter():
 
     threading.Thread(target=loop, name="progress-reporter", daemon=True).start()
 
+# Meta keys the server merges per item rather than replacing wholesale
+MERGED_META_KEYS = ("items_status", "items_progress")
+
+def merge_pending_meta(previous, payload):
+    """Carry per-item meta from a not-yet-sent payload into its replacement."""
+    prev_meta = previous.get("meta")
+    if not prev_meta:
+        return
+    meta = payload.setdefault("meta", {})
+    for key in MERGED_META_KEYS:
+        if key in prev_meta:
+            merged = dict(prev_meta[key])
+            merged.update(meta.get(key) or {})
+            meta[key] = merged
+
 def update_progress(task_id, status, progress=None, message=None, error=None, meta=None):
     payload = {"task_id": task_id, "status": status}
     if progress is not None: payload["progress"] = progress
@@ -439,6 +573,9 @@ def update_progress(task_id, status, progress=None, message=None, error=None, me
         with _progress_lock:
             if task_id in _progress_terminal_tasks:
                 return
+            previous = _progress_pending.get(task_id)
+            if previous:
+                merge_pending_meta(previous, payload)
             _progress_pending[task_id] = payload
         _progress_event.set()
         return
@@ -446,7 +583,10 @@ def update_progress(task_id, status, progress=None, message=None, error=None, me
     if status in {"completed", "failed", "cancelled"}:
         with _progress_lock:
             _progress_terminal_tasks.add(task_id)
-            _progress_pending.pop(task_id, None)
+            previous = _progress_pending.pop(task_id, None)
+            if previous:
+                # Flush per-item statuses the dropped running update carried
+                merge_pending_meta(previous, payload)
 
     post_progress_payload(payload)
 
@@ -485,10 +625,18 @@ def make_cancel_checker(task_id: str, interval_seconds: float = 2.0):
 
 # --- HELPERS ---
 
-def get_provider_from_url(url: str) -> str:
+@functools.lru_cache(maxsize=512)
+def host_of(url: str) -> str:
+    """Lower-cased host of url, or "" if it can't be parsed."""
     try:
-        host = urlparse(url).netloc.lower()
+        return urlparse(url).netloc.lower()
     except Exception:
+        return ""
+
+@functools.lru_cache(maxsize=512)
+def get_provider_from_url(url: str) -> str:
+    host = host_of(url)
+    if not host:
         return "unknown"
     if BASE_HOST and host == BASE_HOST:
         # Treat any local base host URLs as local provider
@@ -503,12 +651,7 @@ def auth_headers_for_source(provider: str, url: str) -> dict:
     if provider in {"local", "lake", "app"}:
         return {"Authorization": f"Bearer {API_KEY}"}
 
-    host = None
-    try:
-        host = urlparse(url).netloc.lower()
-    except Exception:
-        host = None
-
+    host = host_of(url)
     if host and BASE_HOST and host == BASE_HOST:
         return {"Authorization": f"Bearer {API_KEY}"}
 
@@ -520,13 +663,13 @@ def auth_headers_for_source(provider: str, url: str) -> dict:
 
 def get_venv_python() -> Path:
     venv_path = COMFY_DIR / ".venv"
-    if platform.system().lower().startswith("win"):
+    if IS_WINDOWS:
         return venv_path / "Scripts" / "python.exe"
     return venv_path / "bin" / "python"
 
 def get_venv_script(name: str) -> Path:
     venv_path = COMFY_DIR / ".venv"
-    if platform.system().lower().startswith("win"):
+    if IS_WINDOWS:
         return venv_path / "Scripts" / f"{name}.exe"
     return venv_path / "bin" / name
 
@@ -534,51 +677,107 @@ def subprocess_env():
     env = os.environ.copy()
     if COMFY_DIR:
         venv_path = COMFY_DIR / ".venv"
-        script_dir = venv_path / ("Scripts" if platform.system().lower().startswith("win") else "bin")
+        script_dir = venv_path / ("Scripts" if IS_WINDOWS else "bin")
         if script_dir.exists():
             env["VIRTUAL_ENV"] = str(venv_path)
             env["PATH"] = str(script_dir) + os.pathsep + env.get("PATH", "")
     return env
 
-def run_cmd(cmd, cwd=None):
+# Lines of combined stdout/stderr kept from a command for error reporting
+CMD_OUTPUT_TAIL_LINES = 200
+
+def run_cmd(cmd, cwd=None, on_line=None):
+    """Run cmd, streaming its merged output line by line.
+
+    Returns (returncode, output) where output is the last
+    CMD_OUTPUT_TAIL_LINES lines, so a chatty pip install or git clone
+    never piles up in memory. on_line, if given, sees every line as it
+    arrives.
+    """
+    tail = collections.deque(maxlen=CMD_OUTPUT_TAIL_LINES)
     try:
         process = subprocess.Popen(
             cmd,
             cwd=str(cwd) if cwd else None,
             env=subprocess_env(),
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1
         )
-        stdout, stderr = process.communicate()
-        return process.returncode, stdout, stderr
     except FileNotFoundError as e:
-        return 127, "", str(e)
+        return 127, str(e)
+    with process.stdout:
+        for line in process.stdout:
+            tail.append(line)
+            if on_line:
+                on_line(line)
+    return process.wait(), "".join(tail)
+
+def output_progress_reporter(task_id, progress, prefix):
+    """on_line callback that surfaces command output as running progress."""
+    def on_line(line):
+        line = line.strip()
+        if line:
+            update_progress(task_id, "running", progress, f"{prefix}: {line[:200]}")
+    return on_line
+
+# Stamp inside .venv recording how far pip setup got ("pip", "pip-upgraded"),
+# so later tasks skip re-checking it. Recreating the venv removes it.
+BOOTSTRAP_MARKER_NAME = ".bootstrap_ok"
+
+def read_bootstrap_marker() -> str:
+    try:
+        return (COMFY_DIR / ".venv" / BOOTSTRAP_MARKER_NAME).read_text().strip()
+    except OSError:
+        return ""
+
+def write_bootstrap_marker(state: str):
+    try:
+        (COMFY_DIR / ".venv" / BOOTSTRAP_MARKER_NAME).write_text(state)
+    except OSError:
+        pass
 
 def ensure_pip(task_id) -> tuple[bool, str]:
     venv_python = get_venv_python()
     if not venv_python.exists():
         return False, "Venv python not found."
+    if read_bootstrap_marker():
+        return True, ""
 
-    rc, _, err = run_cmd([str(venv_python), "-m", "pip", "--version"], cwd=COMFY_DIR)
+    rc, err = run_cmd([str(venv_python), "-m", "pip", "--version"], cwd=COMFY_DIR)
     if rc == 0:
+        write_bootstrap_marker("pip")
         return True, ""
 
     update_progress(task_id, "running", 0.0, "Bootstrapping pip...")
-    rc, _, err = run_cmd([str(venv_python), "-m", "ensurepip", "--upgrade"], cwd=COMFY_DIR)
+    rc, err = run_cmd([str(venv_python), "-m", "ensurepip", "--upgrade"], cwd=COMFY_DIR)
     if rc == 0:
-        rc, _, err = run_cmd([str(venv_python), "-m", "pip", "--version"], cwd=COMFY_DIR)
+        rc, err = run_cmd([str(venv_python), "-m", "pip", "--version"], cwd=COMFY_DIR)
         if rc == 0:
+            write_bootstrap_marker("pip")
             return True, ""
 
-    rc, _, err = run_cmd(["uv", "pip", "install", "--python", str(venv_python), "pip"], cwd=COMFY_DIR)
+    rc, err = run_cmd(["uv", "pip", "install", "--python", str(venv_python), "pip"], cwd=COMFY_DIR)
     if rc == 0:
-        rc, _, err = run_cmd([str(venv_python), "-m", "pip", "--version"], cwd=COMFY_DIR)
+        rc, err = run_cmd([str(venv_python), "-m", "pip", "--version"], cwd=COMFY_DIR)
         if rc == 0:
+            write_bootstrap_marker("pip")
             return True, ""
 
     return False, err or "pip bootstrap failed."
 
+def pip_install_cmd(venv_python: Path, *args) -> list:
+    """
+    Install command for the venv: uv's resolver when uv is on PATH (it
+    already created the venv), otherwise the venv's own pip.
+    """
+    uv = shutil.which("uv")
+    if uv:
+        return [uv, "pip", "install", "--python", str(venv_python), *args]
+    return [str(venv_python), "-m", "pip", "install", *args]
+
 def package_to_import_name(spec: str) -> str:
     # Strip version/extra markers from package spec; fallback dash->underscore.
     base = re.split(r"[<>=!~\[\]]", spec, maxsplit=1)[0].strip()
@@ -596,7 +795,7 @@ def install_optional_package(venv_python: Path, package: str) -> bool:
 
     last_err = ""
     for cmd in attempts:
-        rc, _, err = run_cmd(cmd, cwd=COMFY_DIR)
+        rc, err = run_cmd(cmd, cwd=COMFY_DIR)
         if rc == 0:
             return True
         last_err = err
@@ -625,18 +824,26 @@ def handle_git_clone(task):
     try:
         log(f"Cloning to {dest_path}...")
         dest_path.parent.mkdir(parents=True, exist_ok=True)
-        # Simple subprocess call
-        cmd = ["git", "clone", repo_url, str(dest_path)]
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        
-        stdout, stderr = process.communicate()
+        # Blobless clone by default: full commit history and tags (so Manager
+        # updates and version switches keep working), but file contents are
+        # only fetched for the checked-out tree. Servers without filter
+        # support just ignore it.
+        cmd = ["git", "clone", "--progress", "--recurse-submodules", "--jobs", "8"]
+        if not payload.get('full_history'):
+            cmd.append("--filter=blob:none")
+            if payload.get('depth'):
+                cmd += ["--depth", str(int(payload['depth'])), "--single-branch", "--shallow-submodules"]
+        if payload.get('ref'):
+            cmd += ["--branch", str(payload['ref'])]
+        cmd += [repo_url, str(dest_path)]
+        rc, output = run_cmd(cmd, on_line=output_progress_reporter(task['id'], 0.0, "Cloning"))
         
-        if process.returncode == 0:
+        if rc == 0:
             log("Clone successful.")
             update_progress(task['id'], "completed", 1.0, "Cloned successfully")
         else:
-            log(f"Clone failed: {stderr}", error=True)
-            update_progress(task['id'], "failed", 0.0, "Git clone failed", error=stderr)
+            log(f"Clone failed: {output}", error=True)
+            update_progress(task['id'], "failed", 0.0, "Git clone failed", error=output)
             
     except Exception as e:
         log(f"Git execution error: {e}", error=True)
@@ -660,16 +867,9 @@ def handle_create_venv(task):
         cmd = ["uv", "venv", "--python", "3.13"]
         
         log(f"Running: {' '.join(cmd)} in {COMFY_DIR}")
-        process = subprocess.Popen(
-            cmd, 
-            cwd=str(COMFY_DIR),
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
-            text=True
-        )
-        stdout, stderr = process.communicate()
+        rc, output = run_cmd(cmd, cwd=COMFY_DIR)
         
-        if process.returncode == 0:
+        if rc == 0:
             log("Venv created successfully.")
             ok, err = ensure_pip(task['id'])
             if ok:
@@ -677,8 +877,8 @@ def handle_create_venv(task):
             else:
                 update_progress(task['id'], "failed", 0.0, "Venv created but pip is missing", error=err)
         else:
-            log(f"Venv creation failed: {stderr}", error=True)
-            update_progress(task['id'], "failed", 0.0, "Venv creation failed", error=stderr)
+            log(f"Venv creation failed: {output}", error=True)
+            update_progress(task['id'], "failed", 0.0, "Venv creation failed", error=output)
 
     except Exception as e:
         log(f"Venv error: {e}", error=True)
@@ -688,7 +888,7 @@ def handle_install_torch(task):
     payload = task.get('payload', {})
     packages = payload.get('packages') or TORCH_PACKAGES
     if isinstance(packages, str):
-        packages = packages.split()
+        packages = shlex.split(packages)
 
     index_url = payload.get('index_url') or TORCH_INDEX_URL
     index_flag = payload.get('index_flag') or TORCH_INDEX_FLAG or "--extra-index-url"
@@ -705,20 +905,24 @@ def handle_install_torch(task):
         update_progress(task['id'], "failed", 0.0, "Torch index URL not set.")
         return
 
-    ok, err = ensure_pip(task['id'])
-    if not ok:
-        update_progress(task['id'], "failed", 0.0, "pip is missing in venv", error=err)
-        return
+    # uv installs into the venv itself, so pip is only needed without it
+    if not shutil.which("uv"):
+        ok, err = ensure_pip(task['id'])
+        if not ok:
+            update_progress(task['id'], "failed", 0.0, "pip is missing in venv", error=err)
+            return
 
-    update_progress(task['id'], "running", 0.0, "Upgrading pip...")
-    rc, _, err = run_cmd([str(venv_python), "-m", "pip", "install", "--upgrade", "pip"], cwd=COMFY_DIR)
-    if rc != 0:
-        update_progress(task['id'], "failed", 0.0, "pip upgrade failed", error=err)
-        return
+    if not shutil.which("uv") and read_bootstrap_marker() != "pip-upgraded":
+        update_progress(task['id'], "running", 0.0, "Upgrading pip...")
+        rc, err = run_cmd([str(venv_python), "-m", "pip", "install", "--upgrade", "pip"], cwd=COMFY_DIR)
+        if rc != 0:
+            update_progress(task['id'], "failed", 0.0, "pip upgrade failed", error=err)
+            return
+        write_bootstrap_marker("pip-upgraded")
 
-    cmd = [str(venv_python), "-m", "pip", "install", *packages, index_flag, index_url]
+    cmd = pip_install_cmd(venv_python, *packages, index_flag, index_url)
     update_progress(task['id'], "running", 0.1, f"Installing PyTorch ({index_flag} {index_url})...")
-    rc, _, err = run_cmd(cmd, cwd=COMFY_DIR)
+    rc, err = run_cmd(cmd, cwd=COMFY_DIR, on_line=output_progress_reporter(task['id'], 0.1, "Installing PyTorch"))
     if rc == 0:
         update_progress(task['id'], "completed", 1.0, "PyTorch installed")
     else:
@@ -739,8 +943,8 @@ def handle_install_requirements(task):
         return
 
     update_progress(task['id'], "running", 0.0, "Installing requirements.txt...")
-    cmd = [str(venv_python), "-m", "pip", "install", "-r", "requirements.txt"]
-    rc, _, err = run_cmd(cmd, cwd=COMFY_DIR)
+    cmd = pip_install_cmd(venv_python, "-r", "requirements.txt")
+    rc, err = run_cmd(cmd, cwd=COMFY_DIR, on_line=output_progress_reporter(task['id'], 0.0, "Installing requirements.txt"))
     if rc != 0:
         update_progress(task['id'], "failed", 0.0, "Requirements install failed", error=err)
         return
@@ -748,8 +952,8 @@ def handle_install_requirements(task):
     manager_requirements = COMFY_DIR / "manager_requirements.txt"
     if manager_requirements.exists():
         update_progress(task['id'], "running", 0.55, "Installing native ComfyUI Manager requirements...")
-        manager_cmd = [str(venv_python), "-m", "pip", "install", "-r", "manager_requirements.txt"]
-        rc, _, err = run_cmd(manager_cmd, cwd=COMFY_DIR)
+        manager_cmd = pip_install_cmd(venv_python, "-r", "manager_requirements.txt")
+        rc, err = run_cmd(manager_cmd, cwd=COMFY_DIR)
         if rc != 0:
             update_progress(task['id'], "failed", 0.0, "Native manager requirements install failed", error=err)
             return
@@ -761,8 +965,8 @@ def handle_install_requirements(task):
     if EXTRA_PIP_PACKAGES:
         extras_label = " ".join(EXTRA_PIP_PACKAGES)
         update_progress(task['id'], "running", 0.75, f"Installing extra dependencies: {extras_label}")
-        extra_cmd = [str(venv_python), "-m", "pip", "install", "-U", *EXTRA_PIP_PACKAGES]
-        rc, _, err = run_cmd(extra_cmd, cwd=COMFY_DIR)
+        extra_cmd = pip_install_cmd(venv_python, "-U", *EXTRA_PIP_PACKAGES)
+        rc, err = run_cmd(extra_cmd, cwd=COMFY_DIR)
         if rc != 0:
             update_progress(task['id'], "failed", 0.0, "Extra dependency install failed", error=err)
             return
@@ -771,7 +975,7 @@ def handle_install_requirements(task):
         update_progress(task['id'], "running", 0.9, f"Verifying imports: {' '.join(imports_to_verify)}")
         for mod in imports_to_verify:
             verify_cmd = [str(venv_python), "-c", f"import {mod}"]
-            rc, _, err = run_cmd(verify_cmd, cwd=COMFY_DIR)
+            rc, err = run_cmd(verify_cmd, cwd=COMFY_DIR)
             if rc != 0:
                 update_progress(task['id'], "failed", 0.0, f"Import check failed: {mod}", error=err)
                 return
@@ -812,12 +1016,12 @@ def handle_install_manager(task):
         return
 
     update_progress(task['id'], "running", 0.0, "Installing native ComfyUI Manager requirements...")
-    rc, _, err = run_cmd([str(venv_python), "-m", "pip", "install", "-r", "manager_requirements.txt"], cwd=COMFY_DIR)
+    rc, err = run_cmd([str(venv_python), "-m", "pip", "install", "-r", "manager_requirements.txt"], cwd=COMFY_DIR)
     if rc != 0:
         update_progress(task['id'], "failed", 0.0, "Native manager requirements install failed", error=err)
         return
 
-    rc, _, err = run_cmd([str(venv_python), "-c", "import cm_cli"], cwd=COMFY_DIR)
+    rc, err = run_cmd([str(venv_python), "-c", "import cm_cli"], cwd=COMFY_DIR)
     if rc != 0:
         update_progress(task['id'], "failed", 0.0, "Native manager installed but cm_cli is not importable", error=err)
         return
@@ -849,17 +1053,17 @@ def ensure_official_manager_cli(task_id: str, progress: float = 0.0) -> bool:
         update_progress(task_id, "failed", progress, "manager_requirements.txt not found; cannot use official Comfy node install.")
         return False
 
-    rc, _, err = run_cmd([str(venv_python), "-m", "pip", "install", "-U", "comfy-cli"], cwd=COMFY_DIR)
+    rc, err = run_cmd([str(venv_python), "-m", "pip", "install", "-U", "comfy-cli"], cwd=COMFY_DIR)
     if rc != 0:
         update_progress(task_id, "failed", progress, "Failed to install comfy-cli", error=err)
         return False
 
-    rc, _, err = run_cmd([str(venv_python), "-m", "pip", "install", "-r", "manager_requirements.txt"], cwd=COMFY_DIR)
+    rc, err = run_cmd([str(venv_python), "-m", "pip", "install", "-r", "manager_requirements.txt"], cwd=COMFY_DIR)
     if rc != 0:
         update_progress(task_id, "failed", progress, "Failed to install manager_requirements.txt", error=err)
         return False
 
-    rc, _, err = run_cmd([str(venv_python), "-c", "import cm_cli"], cwd=COMFY_DIR)
+    rc, err = run_cmd([str(venv_python), "-c", "import cm_cli"], cwd=COMFY_DIR)
     if rc != 0:
         update_progress(task_id, "failed", progress, "cm_cli is not importable after manager requirements install", error=err)
         return False
@@ -897,21 +1101,21 @@ def install_custom_node_from_git(task_id, name, git_url, custom_nodes_dir, venv_
     if dest.exists():
         update_progress(task_id, "running", progress_base, f"Custom node already present: {name}")
     else:
-        rc, _, git_err = run_cmd(["git", "clone", git_url, str(dest)], cwd=custom_nodes_dir)
+        rc, git_err = run_cmd(["git", "clone", git_url, str(dest)], cwd=custom_nodes_dir)
         if rc != 0:
             update_progress(task_id, "failed", progress_base, f"Git clone failed: {name}", error=git_err)
             return False
 
     requirements = dest / "requirements.txt"
     if requirements.exists():
-        rc, _, req_err = run_cmd([str(venv_python), "-m", "pip", "install", "-r", str(requirements)], cwd=COMFY_DIR)
+        rc, req_err = run_cmd([str(venv_python), "-m", "pip", "install", "-r", str(requirements)], cwd=COMFY_DIR)
         if rc != 0:
             update_progress(task_id, "failed", progress_base, f"Requirements install failed: {name}", error=req_err)
             return False
 
     install_py = dest / "install.py"
     if install_py.exists():
-        rc, _, install_err = run_cmd([str(venv_python), str(install_py)], cwd=dest)
+        rc, install_err = run_cmd([str(venv_python), str(install_py)], cwd=dest)
         if rc != 0:
             update_progress(task_id, "failed", progress_base, f"Custom node install.py failed: {name}", error=install_err)
             return False
@@ -941,7 +1145,7 @@ except KeyError as exc:
         raise SystemExit(42)
     raise
 """
-    rc, _, err = run_cmd([str(venv_python), "-c", check_code], cwd=COMFY_DIR)
+    rc, err = run_cmd([str(venv_python), "-c", check_code], cwd=COMFY_DIR)
     if rc == 0:
         return True
     if rc != 42:
@@ -949,12 +1153,12 @@ except KeyError as exc:
         return True
 
     update_progress(task_id, "running", progress, f"Applying compatibility pin: {TRANSFORMERS_COMPAT_PIN}")
-    rc, _, install_err = run_cmd([str(venv_python), "-m", "pip", "install", TRANSFORMERS_COMPAT_PIN], cwd=COMFY_DIR)
+    rc, install_err = run_cmd([str(venv_python), "-m", "pip", "install", TRANSFORMERS_COMPAT_PIN], cwd=COMFY_DIR)
     if rc != 0:
         update_progress(task_id, "failed", progress, f"Failed to apply compatibility pin: {TRANSFORMERS_COMPAT_PIN}", error=install_err)
         return False
 
-    rc, _, verify_err = run_cmd([str(venv_python), "-c", check_code], cwd=COMFY_DIR)
+    rc, verify_err = run_cmd([str(venv_python), "-c", check_code], cwd=COMFY_DIR)
     if rc != 0:
         update_progress(task_id, "failed", progress, "Transformers compatibility check still fails after pin.", error=verify_err)
         return False
@@ -1005,24 +1209,24 @@ def handle_install_custom_nodes(task):
 
             comfy_exe = get_venv_script("comfy")
             if comfy_exe.exists():
-                rc, out, cli_err = run_cmd([str(comfy_exe), "--skip-prompt", "--workspace", str(COMFY_DIR), "node", "install", node_id], cwd=COMFY_DIR)
+                rc, cli_output = run_cmd([str(comfy_exe), "--skip-prompt", "--workspace", str(COMFY_DIR), "node", "install", node_id], cwd=COMFY_DIR)
             else:
                 comfy_path = shutil.which("comfy")
                 if comfy_path:
-                    rc, out, cli_err = run_cmd([comfy_path, "--skip-prompt", "--workspace", str(COMFY_DIR), "node", "install", node_id], cwd=COMFY_DIR)
+                    rc, cli_output = run_cmd([comfy_path, "--skip-prompt", "--workspace", str(COMFY_DIR), "node", "install", node_id], cwd=COMFY_DIR)
                 else:
-                    rc, out, cli_err = 127, "", "comfy command not found after installing comfy-cli"
+                    rc, cli_output = 127, "comfy command not found after installing comfy-cli"
             if rc == 0:
                 if not repo or custom_node_present(custom_nodes_dir, repo, name, node_id):
                     update_progress(task["id"], "running", progress_done, f"Installed custom node: {name}")
                     continue
                 log(f"Registry install reported success but no custom_nodes directory was found for {name}; falling back to Git clone.")
             elif not repo:
-                cli_output = f"{out}\n{cli_err}".strip()
+                cli_output = cli_output.strip()
                 update_progress(task["id"], "failed", progress_base, f"Official registry install failed: {name}", error=cli_output)
                 return
 
-            cli_output = f"{out}\n{cli_err}".strip()
+            cli_output = cli_output.strip()
             if cli_output:
                 log(f"Official registry install did not complete for {name}; falling back to Git clone. Output: {cli_output}")
 
@@ -1047,7 +1251,124 @@ def parse_content_range_total(value):
         return 0
     return int(match.group(1))
 
-def probe_range_download(url, headers, should_cancel=None):
+def iter_raw_chunks(r, chunk_size=CHUNK_SIZE):
+    """
+    Yield the response body straight from the urllib3 stream.
+
+    Skips requests' iter_content generator and, for identity-encoded bodies,
+    urllib3's decoder. Bodies a server compressed anyway are still decoded.
+    """
+    encoding = r.headers.get("content-encoding", "").strip().lower()
+    decode = encoding not in ("", "identity")
+    while True:
+        chunk = r.raw.read(chunk_size, decode_content=decode)
+        if not chunk:
+            return
+        yield chunk
+
+def start_file_writer(f, depth=DOWNLOAD_WRITE_QUEUE_CHUNKS, hasher=None):
+    """
+    Write chunks to `f` on a background thread, at most `depth` chunks behind,
+    feeding each one to `hasher` too when given.
+
+    Returns (write, close). close() waits for queued chunks to land and
+    re-raises the first write error, if any.
+    """
+    pending = queue.Queue(maxsize=depth)
+    errors = []
+
+    def run():
+        while True:
+            chunk = pending.get()
+            if chunk is None:
+                return
+            if not errors:
+                try:
+                    f.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                except Exception as e:
+                    errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    def write(chunk):
+        if errors:
+            raise errors[0]
+        pending.put(chunk)
+
+    def close():
+        pending.put(None)
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    return write, close
+
+def verifiable_hash(value):
+    """Return the full BLAKE3 hex digest in a resolved hash, or None if it can't be checked."""
+    if blake3 is None or not value:
+        return None
+    value = value.strip().lower()
+    # Partial "fast:" hashes from fast dedupe scans can't be verified here
+    if len(value) != 64 or any(c not in "0123456789abcdef" for c in value):
+        return None
+    return value
+
+def hash_file_prefix(path, length):
+    """BLAKE3 hasher primed with the first `length` bytes of an existing .part file."""
+    hasher = blake3.blake3()
+    with open(path, "rb") as f:
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+def verify_download(path, expected, hasher=None):
+    """
+    Check a finished download against its expected BLAKE3 and remove it on a
+    mismatch. Returns an error message, or None when the hash matches.
+    """
+    if hasher is None:
+        hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        hasher.update_mmap(path)
+    actual = hasher.hexdigest()
+    if actual == expected:
+        return None
+    try:
+        path.unlink()
+    except OSError:
+        pass
+    clear_resume_validator(path)
+    return f"Hash mismatch (expected {expected[:12]}..., got {actual[:12]}...)"
+
+def preallocate_file(path, size):
+    """Reserve `size` bytes so the filesystem can lay the file out in few extents."""
+    with open(path, "r+b") as f:
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return
+            except OSError:
+                pass  # filesystem without fallocate support
+        f.truncate(size)
+
+def remote_content_length(session, url, headers):
+    """Size of the remote file from a HEAD request, or 0 if unknown."""
+    try:
+        r = session.head(url, headers=headers, allow_redirects=True, timeout=10)
+        if r.ok:
+            return int(r.headers.get("content-length", 0))
+    except Exception:
+        pass
+    return 0
+
+def probe_range_download(url, headers, should_cancel=None, session=None):
     if DOWNLOAD_SEGMENTS <= 1:
         return 0
     if should_cancel and should_cancel():
@@ -1056,7 +1377,7 @@ def probe_range_download(url, headers, should_cancel=None):
     probe_headers = dict(headers or {})
     probe_headers["Range"] = "bytes=0-0"
     try:
-        with requests.get(url, headers=probe_headers, stream=True, timeout=STALL_TIMEOUT) as r:
+        with (session or download_session).get(url, headers=probe_headers, stream=True, timeout=STALL_TIMEOUT) as r:
             if r.status_code != 206:
                 log(f"Range probe returned HTTP {r.status_code}; using single-stream fallback.")
                 return 0
@@ -1077,7 +1398,9 @@ def segmented_range_download(
     extra_headers=None,
     should_cancel=None,
     progress_callback=None,
+    session=None,
 ):
+    session = session or download_session
     min_segment_bytes = DOWNLOAD_SEGMENT_MIN_MIB * 1024 * 1024
     segment_count = min(DOWNLOAD_SEGMENTS, max(1, (total_size + min_segment_bytes - 1) // min_segment_bytes))
     if segment_count <= 1:
@@ -1089,21 +1412,58 @@ def segmented_range_download(
     for index in range(segment_count):
         start = index * segment_size
         end = total_size - 1 if index == segment_count - 1 else ((index + 1) * segment_size) - 1
-        part_path = Path(f"{dest_path}.seg{index}")
-        segments.append((index, start, end, part_path))
+        segments.append((index, start, end))
 
+    # Every segment writes at its own offset of one file, so nothing has to be
+    # stitched together afterwards. Per-segment byte counts live in a small
+    # sidecar so an interrupted download resumes each range where it stopped.
+    data_path = Path(f"{dest_path}.segs")
+    state_path = Path(f"{dest_path}.segs.json")
     downloaded_by_segment = [0] * segment_count
     lock = threading.Lock()
     last_progress_ts = [0.0]
 
-    for index, start, end, part_path in segments:
-        expected = end - start + 1
-        if part_path.exists():
-            current = part_path.stat().st_size
-            if current > expected:
-                part_path.unlink()
-                current = 0
-            downloaded_by_segment[index] = current
+    if data_path.exists():
+        try:
+            state = json.loads(state_path.read_text())
+            if state.get("total") == total_size and len(state.get("done", [])) == segment_count:
+                downloaded_by_segment = [
+                    min(int(done), end - start + 1)
+                    for done, (_, start, end) in zip(state["done"], segments)
+                ]
+        except (OSError, ValueError, TypeError):
+            pass
+    if not any(downloaded_by_segment):
+        with open(data_path, "wb"):
+            pass
+        if DOWNLOAD_PREALLOCATE:
+            preallocate_file(data_path, total_size)
+
+    # Held across fsync + write so a slow save never lands after a newer one
+    save_lock = threading.Lock()
+    last_save_ts = [time.monotonic()]
+
+    def save_state(force=False):
+        """
+        Record per-segment progress. The counts are snapshotted first and the
+        data file fsynced before the sidecar is replaced, so the sidecar never
+        claims bytes that a crash or power loss could still take back.
+        """
+        with save_lock:
+            now = time.monotonic()
+            if not force and now - last_save_ts[0] < SEGMENT_STATE_SAVE_SECONDS:
+                return
+            last_save_ts[0] = now
+            with lock:
+                done = list(downloaded_by_segment)
+            try:
+                with open(data_path, "r+b") as f:
+                    os.fsync(f.fileno())
+                tmp_path = state_path.with_name(state_path.name + ".tmp")
+                tmp_path.write_text(json.dumps({"total": total_size, "done": done}))
+                os.replace(tmp_path, state_path)
+            except OSError:
+                pass
 
     def report_progress(force=False):
         now = time.time()
@@ -1112,75 +1472,127 @@ def segmented_range_download(
                 return
             last_progress_ts[0] = now
             downloaded = sum(downloaded_by_segment)
+        save_state()
         pct = downloaded / total_size if total_size else 0
         if progress_callback:
             progress_callback(downloaded, total_size, pct)
         else:
             update_progress(task_id, "running", pct, f"Downloading: {int(pct * 100)}%")
 
-    def download_segment(index, start, end, part_path):
+    def fetch_segment(index, start, end):
         expected = end - start + 1
-        existing = part_path.stat().st_size if part_path.exists() else 0
+        existing = downloaded_by_segment[index]
         if existing == expected:
             report_progress(force=True)
             return
-        if existing > expected:
-            part_path.unlink()
-            existing = 0
 
         headers = dict(headers_base)
         headers["Range"] = f"bytes={start + existing}-{end}"
-        session = requests.Session()
-        session.headers.update({"User-Agent": USER_AGENT})
-        mode = "ab" if existing else "wb"
 
         with session.get(url, headers=headers, stream=True, timeout=STALL_TIMEOUT) as r:
             if r.status_code != 206:
                 raise RuntimeError(f"Range request returned HTTP {r.status_code}")
-            with open(part_path, mode) as f:
-                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+            # Unbuffered, so every byte counted below has reached the kernel
+            with open(data_path, "r+b", buffering=0) as f:
+                f.seek(start + existing)
+                for chunk in iter_raw_chunks(r):
                     if should_cancel and should_cancel():
                         raise RuntimeError("cancelled")
+                    chunk = chunk[:expected - downloaded_by_segment[index]]
                     if not chunk:
-                        continue
-                    f.write(chunk)
+                        break
+                    view = memoryview(chunk)
+                    while view:
+                        view = view[f.write(view):]
                     with lock:
                         downloaded_by_segment[index] += len(chunk)
                     report_progress()
 
-        if part_path.stat().st_size != expected:
+        if downloaded_by_segment[index] != expected:
             raise RuntimeError(f"segment {index + 1}/{segment_count} incomplete")
 
+    def download_segment(index, start, end):
+        # Retry just this range, from what it already wrote, so one dropped
+        # connection doesn't throw the whole parallel download back to a
+        # single stream.
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return fetch_segment(index, start, end)
+            except Exception as e:
+                if str(e) == "cancelled" or (should_cancel and should_cancel()) or attempt >= DOWNLOAD_MAX_RETRIES:
+                    raise
+                wait_s = DOWNLOAD_RETRY_BACKOFF_SECONDS * attempt
+                log(f"Segment {index + 1}/{segment_count} failed, retrying in {wait_s:.1f}s (attempt {attempt}/{DOWNLOAD_MAX_RETRIES}): {e}", error=True)
+                time.sleep(wait_s)
+
     log(f"Downloading {dest_path.name} with {segment_count} parallel byte ranges")
     try:
-        with ThreadPoolExecutor(max_workers=segment_count) as executor:
-            futures = [
-                executor.submit(download_segment, index, start, end, part_path)
-                for index, start, end, part_path in segments
-            ]
-            for future in futures:
-                future.result()
+        try:
+            with ThreadPoolExecutor(max_workers=segment_count) as executor:
+                futures = [
+                    executor.submit(download_segment, index, start, end)
+                    for index, start, end in segments
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            save_state(force=True)
 
         if should_cancel and should_cancel():
             return False, "cancelled"
 
-        with open(dest_path, "wb") as out:
-            for _, _, _, part_path in segments:
-                with open(part_path, "rb") as part:
-                    shutil.copyfileobj(part, out, length=CHUNK_SIZE)
-
-        for _, _, _, part_path in segments:
+        report_progress(force=True)
+        os.replace(data_path, dest_path)
+        for path in (state_path, state_path.with_name(state_path.name + ".tmp")):
             try:
-                part_path.unlink()
+                path.unlink()
             except OSError:
                 pass
-        report_progress(force=True)
         return True, None
     except Exception as e:
         if (should_cancel and should_cancel()) or str(e) == "cancelled":
             return False, "cancelled"
         return False, str(e)
 
+def resume_meta_path(part_path):
+    return part_path.with_name(part_path.name + ".meta")
+
+def save_resume_validator(part_path, r, preallocated=False):
+    """
+    Remember what a fresh .part was downloaded from, for If-Range later.
+    `preallocated` marks a .part whose size is not yet its written length.
+    """
+    etag = r.headers.get("etag")
+    if etag and etag.startswith("W/"):
+        etag = None  # If-Range only accepts strong validators
+    last_modified = r.headers.get("last-modified")
+    meta_path = resume_meta_path(part_path)
+    try:
+        if etag or last_modified or preallocated:
+            meta = {"etag": etag, "last_modified": last_modified}
+            if preallocated:
+                meta["preallocated"] = True
+            meta_path.write_text(json.dumps(meta))
+        else:
+            meta_path.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+def load_resume_meta(part_path) -> dict:
+    try:
+        meta = json.loads(resume_meta_path(part_path).read_text())
+    except (OSError, ValueError):
+        return {}
+    return meta if isinstance(meta, dict) else {}
+
+def clear_resume_validator(part_path):
+    try:
+        resume_meta_path(part_path).unlink(missing_ok=True)
+    except OSError:
+        pass
+
 def download_from_source(
     url,
     dest_path,
@@ -1190,8 +1602,10 @@ def download_from_source(
     session=None,
     should_cancel=None,
     progress_callback=None,
+    expected_hash=None,
 ):
     sess = session or download_session
+    expected = verifiable_hash(expected_hash)
     attempt = 0
     while attempt < DOWNLOAD_MAX_RETRIES:
         if should_cancel and should_cancel():
@@ -1202,14 +1616,28 @@ def download_from_source(
             headers.update(extra_headers)
         mode = 'wb'
         attempt_existing = existing_size
+        if attempt > 1:
+            # Resume from what earlier attempts actually wrote
+            attempt_existing = dest_path.stat().st_size if dest_path.exists() else 0
+        resume_meta = load_resume_meta(dest_path) if attempt_existing > 0 else {}
+        if resume_meta.get("preallocated"):
+            # Killed before the preallocated tail was trimmed, so the .part
+            # size says nothing about how much was actually written.
+            log(f"Restarting {dest_path.name}: interrupted preallocated download.")
+            attempt_existing = existing_size = 0
         if attempt_existing > 0:
             headers['Range'] = f'bytes={attempt_existing}-'
             mode = 'ab'
+            # Only continue the .part if upstream still serves the same
+            # file; otherwise the server answers 200 and we start over.
+            validator = resume_meta.get("etag") or resume_meta.get("last_modified")
+            if validator:
+                headers['If-Range'] = validator
 
         try:
             range_total_size = 0
             if attempt_existing == 0:
-                range_total_size = probe_range_download(url, headers, should_cancel=should_cancel)
+                range_total_size = probe_range_download(url, headers, should_cancel=should_cancel, session=sess)
 
                 if range_total_size:
                     ok, err = segmented_range_download(
@@ -1220,7 +1648,12 @@ def download_from_source(
                         extra_headers=headers,
                         should_cancel=should_cancel,
                         progress_callback=progress_callback,
+                        session=sess,
                     )
+                    if ok and expected:
+                        mismatch = verify_download(dest_path, expected)
+                        if mismatch:
+                            return False, mismatch
                     if ok or err == "cancelled":
                         return ok, err
                     log(f"Segmented download unavailable, falling back to single stream: {err}")
@@ -1241,14 +1674,40 @@ def download_from_source(
                     snippet = f" Body: {body_preview[:240]}" if body_preview else ""
                     return False, f"Upstream HTTP {r.status_code} from source after {DOWNLOAD_MAX_RETRIES} attempts.{snippet}"
 
+                # Resume offset at or past the end: the .part is already
+                # complete, or longer than the remote file (torn earlier write)
+                if r.status_code == 416 and attempt_existing > 0:
+                    remote_total = (
+                        parse_content_range_total(r.headers.get("content-range"))
+                        or remote_content_length(sess, url, extra_headers)
+                    )
+                    if remote_total == attempt_existing:
+                        log(f"{dest_path.name} was already fully downloaded.")
+                        if expected:
+                            mismatch = verify_download(dest_path, expected)
+                            if mismatch:
+                                return False, mismatch
+                        clear_resume_validator(dest_path)
+                        return True, None
+                    if remote_total and attempt_existing > remote_total:
+                        log(f"Discarding {dest_path.name}: larger than the remote file.", error=True)
+                        dest_path.unlink()
+                        clear_resume_validator(dest_path)
+                        existing_size = 0
+                        continue
+
                 r.raise_for_status()
 
-                # If server ignored Range, restart file write from zero.
+                # If server ignored Range (or If-Range said the file
+                # changed), restart file write from zero.
                 if attempt_existing > 0 and r.status_code == 200:
                     mode = 'wb'
                     attempt_existing = 0
 
                 total_size = int(r.headers.get('content-length', 0)) + attempt_existing
+                preallocate = DOWNLOAD_PREALLOCATE and mode == 'wb' and total_size >= PREALLOCATE_MIN_BYTES
+                if mode == 'wb':
+                    save_resume_validator(dest_path, r, preallocated=preallocate)
                 downloaded = attempt_existing
 
                 log(
@@ -1256,13 +1715,23 @@ def download_from_source(
                     if attempt_existing else f"Downloading {dest_path.name}"
                 )
 
+                # Hash inline with the writes so verification costs no extra read
+                hasher = None
+                if expected:
+                    hasher = hash_file_prefix(dest_path, attempt_existing) if attempt_existing else blake3.blake3()
+
                 with open(dest_path, mode) as f:
-                    last_update = time.time()
-                    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
-                        if should_cancel and should_cancel():
-                            return False, "cancelled"
-                        if chunk:
-                            f.write(chunk)
+                    if preallocate:
+                        # Contiguous extents for the whole file; writes start at 0
+                        preallocate_file(dest_path, total_size)
+                    # Disk writes run on a helper thread so the socket keeps draining
+                    write_chunk, finish_writes = start_file_writer(f, hasher=hasher)
+                    try:
+                        last_update = time.time()
+                        for chunk in iter_raw_chunks(r):
+                            if should_cancel and should_cancel():
+                                return False, "cancelled"
+                            write_chunk(chunk)
                             downloaded += len(chunk)
 
                             # Throttle updates to keep the UI responsive without hammering the controller.
@@ -1274,11 +1743,23 @@ def download_from_source(
                                 else:
                                     update_progress(task_id, "running", pct, f"Downloading: {int(pct*100)}%")
                                 last_update = now
+                    finally:
+                        finish_writes()
+                        if preallocate and downloaded != total_size:
+                            # Trim the reserved tail so a resume starts where we stopped
+                            f.truncate(downloaded)
+                            save_resume_validator(dest_path, r)
+
+                if hasher is not None:
+                    mismatch = verify_download(dest_path, expected, hasher)
+                    if mismatch:
+                        return False, mismatch
 
                 if progress_callback:
                     pct = downloaded / total_size if total_size else 1.0
                     progress_callback(downloaded, total_size, pct)
 
+                clear_resume_validator(dest_path)
                 return True, None
         except Exception as e:
             if should_cancel and should_cancel():
@@ -1292,6 +1773,39 @@ def download_from_source(
 
     return False, "Download retries exhausted."
 
+def existing_download_complete(dest_path, root_type, expected_size=None, url=None, headers=None, session=None):
+    """
+    Decide whether a file already at dest_path is the finished download,
+    judged by size (from the caller, else a HEAD request). Only an exact
+    match (or no known size) counts. The existing file is never touched:
+    on a mismatch the caller downloads to .part and replaces it only once
+    that download has completed and verified.
+    """
+    if root_type == "workflows":
+        return True  # rewritten by postprocess_downloaded_asset, size won't match
+    remote_size = expected_size or (
+        remote_content_length(session or download_session, url, headers) if url else 0
+    )
+    local_size = dest_path.stat().st_size
+    if not remote_size or local_size == remote_size:
+        return True
+    log(f"{dest_path.name} does not match the remote size ({local_size}/{remote_size} bytes); downloading a fresh copy.")
+    return False
+
+def finalize_download(temp_dest, final_dest):
+    """Flush a finished .part to disk, then move it into place atomically."""
+    # r+b: Windows only allows fsync on handles opened for writing
+    with open(temp_dest, "r+b") as f:
+        os.fsync(f.fileno())
+    os.replace(temp_dest, final_dest)
+    if hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself (POSIX)
+        dir_fd = os.open(final_dest.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
 def handle_download(task):
     payload = task.get('payload', {})
     file_hash = payload.get('hash')
@@ -1329,8 +1843,8 @@ def handle_download(task):
         return
     final_dest.parent.mkdir(parents=True, exist_ok=True)
     
-    # Check if exists (Simple check, not verifying hash in this iteration)
-    if final_dest.exists():
+    # Check if exists (by size, not verifying hash in this iteration)
+    if final_dest.exists() and existing_download_complete(final_dest, root_type, resolution.get('expected_size')):
         log(f"File {final_dest.name} already exists. Skipping.")
         postprocess_downloaded_asset(root_type, final_dest)
         update_progress(task['id'], "completed", 1.0, "Already exists")
@@ -1376,10 +1890,11 @@ def handle_download(task):
             current_size,
             extra_headers=headers,
             should_cancel=should_cancel,
+            expected_hash=resolution.get('hash') or file_hash,
         )
         
         if ok:
-            temp_dest.rename(final_dest)
+            finalize_download(temp_dest, final_dest)
             postprocess_downloaded_asset(root_type, final_dest)
             success = True
             break
@@ -1427,6 +1942,7 @@ def handle_download_urls(task):
             "url": url,
             "size_bytes": size_bytes,
             "provider": provider,
+            "hash": item.get('hash'),
         })
 
     update_progress(
@@ -1531,11 +2047,18 @@ def handle_download_urls(task):
     queues["other"] = sort_items(queues["other"], ascending=False)
 
     def worker(provider, queue_items):
-        session = requests.Session()
-        session.headers.update({"User-Agent": USER_AGENT})
+        session = get_download_session(provider)
+        # Provider keys can't change mid-task, so decide the skip once
+        missing_key = None
+        if provider == "huggingface" and not HF_API_KEY:
+            missing_key = ("Hugging Face", "HF")
+        elif provider == "civitai" and not CIVITAI_API_KEY:
+            missing_key = ("Civitai", "Civitai")
 
-        for item in queue_items:
-            if should_cancel():
+        while not should_cancel():
+            try:
+                item = queue_items.popleft()
+            except IndexError:
                 break
             relpath = item.get('relpath')
             root_type = item.get('root_type') or "models"
@@ -1546,13 +2069,10 @@ def handle_download_urls(task):
                 update_item(item_key, "skipped", f"Skipping {item_key} (missing data)", done_delta=1)
                 continue
 
-            if provider == "huggingface" and not HF_API_KEY:
-                log(f"Skipping Hugging Face URL (no HF key provided): {relpath}")
-                update_item(item_key, "skipped", f"Skipped HF (no key): {relpath}", done_delta=1)
-                continue
-            if provider == "civitai" and not CIVITAI_API_KEY:
-                log(f"Skipping Civitai URL (no Civitai key provided): {relpath}")
-                update_item(item_key, "skipped", f"Skipped Civitai (no key): {relpath}", done_delta=1)
+            if missing_key:
+                provider_name, key_name = missing_key
+                log(f"Skipping {provider_name} URL (no {key_name} key provided): {relpath}")
+                update_item(item_key, "skipped", f"Skipped {key_name} (no key): {relpath}", done_delta=1)
                 continue
 
             try:
@@ -1563,7 +2083,10 @@ def handle_download_urls(task):
                 continue
             dest_path.parent.mkdir(parents=True, exist_ok=True)
 
-            if dest_path.exists():
+            headers = auth_headers_for_source(provider, url)
+            if dest_path.exists() and existing_download_complete(
+                dest_path, root_type, item.get('size_bytes'), url, headers, session
+            ):
                 log(f"{relpath} already exists. Skipping.")
                 postprocess_downloaded_asset(root_type, dest_path)
                 update_item(item_key, "skipped", f"Skipping existing: {relpath}", done_delta=1)
@@ -1574,7 +2097,6 @@ def handle_download_urls(task):
             temp_dest = dest_path.with_suffix(dest_path.suffix + ".part")
             current_size = temp_dest.stat().st_size if temp_dest.exists() else 0
 
-            headers = auth_headers_for_source(provider, url)
             ok, err = download_from_source(
                 url,
                 temp_dest,
@@ -1583,6 +2105,7 @@ def handle_download_urls(task):
                 extra_headers=headers,
                 session=session,
                 should_cancel=should_cancel,
+                expected_hash=item.get('hash'),
                 progress_callback=lambda downloaded, total_size, pct, key=item_key, path=relpath: update_item_download_progress(
                     key,
                     downloaded,
@@ -1593,7 +2116,7 @@ def handle_download_urls(task):
             )
 
             if ok:
-                temp_dest.rename(dest_path)
+                finalize_download(temp_dest, dest_path)
                 postprocess_downloaded_asset(root_type, dest_path)
                 log(f"Successfully downloaded {relpath}")
                 update_item(item_key, "completed", f"Completed: {relpath}", done_delta=1)
@@ -1611,20 +2134,24 @@ def handle_download_urls(task):
         "other": OTHER_DOWNLOAD_WORKERS,
     }
 
-    def split_provider_queue(provider, items):
+    def provider_workers(provider, items):
+        # The provider's workers pull from one shared queue, so a slow file
+        # only holds up its own worker while the others keep going.
         if not items:
             return []
-        worker_limit = provider_worker_limits.get(provider, 1)
-        worker_count = min(worker_limit, len(items))
-        return [
-            (provider, items[index::worker_count])
-            for index in range(worker_count)
-            if items[index::worker_count]
-        ]
-
-    active_queues = []
-    for provider, items in queues.items():
-        active_queues.extend(split_provider_queue(provider, items))
+        shared = collections.deque(items)
+        worker_count = min(provider_worker_limits.get(provider, 1), len(items))
+        return [(provider, shared)] * worker_count
+
+    # Interleave providers so every provider gets a worker before any gets
+    # a second one when DOWNLOAD_BATCH_WORKERS is the tighter limit.
+    per_provider = [provider_workers(provider, items) for provider, items in queues.items()]
+    active_queues = [
+        entry
+        for round_entries in itertools.zip_longest(*per_provider)
+        for entry in round_entries
+        if entry is not None
+    ]
     if active_queues:
         batch_workers = min(DOWNLOAD_BATCH_WORKERS, len(active_queues))
         with ThreadPoolExecutor(max_workers=batch_workers) as executor:
@@ -1723,12 +2250,11 @@ def main():
     
     log("Waiting for tasks (Ctrl+C to stop)...")
     
+    poll_backoff = 0.0
     while True:
         try:
-            # 1. Heartbeat
-            api_session.post(f"{BASE_URL}/api/remote/agent/heartbeat")
-            
-            # 2. Get Task (with long-polling timeout on server side)
+            # Long-poll for a task; the server counts the poll as our heartbeat
+            poll_started = time.monotonic()
             task = get_next_task()
             if task:
                 log(f"Received Task: {task['type']} ({task['id']})")
@@ -1757,8 +2283,16 @@ def main():
                 finally:
                     _keepalive_active.clear()
             
-            if not task:
-                time.sleep(1) # Backup sleep if long poll returns fast
+            if task:
+                poll_backoff = 0.0
+            elif time.monotonic() - poll_started < 1.0:
+                # The poll came back at once (no active session, server or
+                # network error): back off with jitter instead of spinning
+                poll_backoff = min(POLL_BACKOFF_MAX_SECONDS, max(1.0, poll_backoff * 2))
+                time.sleep(poll_backoff * (1 + random.random() * 0.5))
+            else:
+                # The server held the poll, so we already waited; poll again now
+                poll_backoff = 0.0
                 
         except KeyboardInterrupt:
             log("Stopping agent.")
@@ -0,0 +1,23 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+from app import database
+from app.config import get_settings
+
+
+@pytest.fixture
+async def db_path(tmp_path, monkeypatch):
+    """A fresh app database in a temp dir, used by get_db() for the test."""
+    monkeypatch.setenv("LOCAL_MODELS_ROOT", str(tmp_path / "local"))
+    monkeypatch.setenv("LAKE_MODELS_ROOT", str(tmp_path / "lake"))
+    monkeypatch.setenv("APP_DATA_DIR", str(tmp_path / "data"))
+    get_settings.cache_clear()
+    await database.close_db_pool()
+
+    path = get_settings().get_db_path()
+    await database.init_db(path)
+    yield path
+
+    await database.close_db_pool()
+    get_settings.cache_clear()
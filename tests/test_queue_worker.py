@@ -0,0 +1,158 @@
+"""Tests for the queue worker's task claiming, wakeups and copies."""
+
+import asyncio
+import os
+import threading
+
+import aiosqlite
+import blake3
+import pytest
+
+from app.config import get_settings
+from app.services import worker as worker_module
+from app.services.worker import IDLE_POLL_INTERVAL, QueueWorker
+
+
+async def _add_task(db_path, created_at: str, status: str = "pending") -> int:
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute(
+            "INSERT INTO queue (task_type, status, src_side, src_relpath, dst_side, dst_relpath, created_at) "
+            "VALUES ('copy', ?, 'lake', ?, 'local', ?, ?)",
+            (status, f"{created_at}.safetensors", f"{created_at}.safetensors", created_at),
+        )
+        await db.commit()
+        return cursor.lastrowid
+
+
+async def _statuses(db_path) -> dict[int, str]:
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("SELECT id, status FROM queue")
+        return {row[0]: row[1] for row in await cursor.fetchall()}
+
+
+async def test_pending_index_serves_claim_order(db_path):
+    # Same subquery as _claim_next_task; INDEXED BY fails outright if the
+    # partial index cannot answer it
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM queue INDEXED BY idx_queue_pending "
+            "WHERE status = 'pending' ORDER BY created_at ASC LIMIT 1"
+        )
+        plan = " ".join(row[3] for row in await cursor.fetchall())
+    assert "idx_queue_pending" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+async def test_claim_takes_pending_tasks_in_created_order(db_path):
+    # Inserted out of order, so id order and created_at order disagree
+    third = await _add_task(db_path, "2024-01-03T00:00:00")
+    first = await _add_task(db_path, "2024-01-01T00:00:00")
+    done = await _add_task(db_path, "2023-12-31T00:00:00", status="completed")
+    second = await _add_task(db_path, "2024-01-02T00:00:00")
+
+    worker = QueueWorker()
+    claimed = [await worker._claim_next_task() for _ in range(3)]
+
+    assert [task["id"] for task in claimed] == [first, second, third]
+    assert claimed[0]["task_type"] == "copy"
+    assert claimed[0]["src_relpath"] == "2024-01-01T00:00:00.safetensors"
+    assert await worker._claim_next_task() is None
+
+    statuses = await _statuses(db_path)
+    assert statuses == {first: "running", second: "running", third: "running", done: "completed"}
+
+
+async def test_concurrent_claims_never_return_the_same_task(db_path):
+    ids = [await _add_task(db_path, f"2024-01-01T00:00:{i:02d}") for i in range(10)]
+
+    workers = [QueueWorker() for _ in range(4)]
+    results = await asyncio.gather(*(w._claim_next_task() for w in workers for _ in range(4)))
+
+    claimed = [task["id"] for task in results if task]
+    assert len(claimed) == len(set(claimed))
+    assert sorted(claimed) == ids
+    assert results.count(None) == 16 - len(ids)
+
+
+@pytest.fixture
+async def wake_state(monkeypatch):
+    """Install the wake event and loop start() would, without the worker loop."""
+    monkeypatch.setattr(QueueWorker, "_wake", asyncio.Event())
+    monkeypatch.setattr(QueueWorker, "_loop", asyncio.get_running_loop())
+    return QueueWorker._wake
+
+
+async def test_notify_from_worker_thread_wakes_loop(wake_state):
+    waiter = asyncio.create_task(QueueWorker._wait_for_wake(IDLE_POLL_INTERVAL))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    thread = threading.Thread(target=QueueWorker.notify)
+    thread.start()
+    await asyncio.to_thread(thread.join)
+
+    # Well inside the idle poll interval, so the wakeup came from notify()
+    await asyncio.wait_for(waiter, timeout=1.0)
+    assert wake_state.is_set()
+
+
+async def test_notify_from_loop_sets_wake_directly(wake_state):
+    QueueWorker.notify()
+    assert wake_state.is_set()
+
+
+def test_notify_before_start_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(QueueWorker, "_wake", None)
+    monkeypatch.setattr(QueueWorker, "_loop", None)
+    QueueWorker.notify()
+
+
+@pytest.fixture
+def copy_task(db_path, monkeypatch):
+    """A lake -> local copy task whose source takes the copy_file_range path."""
+    monkeypatch.setattr(worker_module, "SMALL_COPY_BYTES", 0)
+    settings = get_settings()
+    src = settings.lake_models_root / "checkpoints" / "model.safetensors"
+    src.parent.mkdir(parents=True)
+    src.write_bytes(os.urandom(256 * 1024))
+    task = {
+        "id": 1,
+        "task_type": "copy",
+        "src_side": "lake",
+        "src_relpath": "checkpoints/model.safetensors",
+        "dst_side": "local",
+        "dst_relpath": "checkpoints/model.safetensors",
+    }
+    return task, src, settings.local_models_root / "checkpoints" / "model.safetensors"
+
+
+async def test_copy_falls_back_when_copy_file_range_copies_nothing(copy_task, monkeypatch):
+    # FUSE and some network filesystems answer with 0 at offset 0 instead of
+    # an error
+    monkeypatch.setattr(os, "copy_file_range", lambda *args, **kwargs: 0, raising=False)
+    task, src, dst = copy_task
+
+    final_writes = await QueueWorker()._execute_copy(task)
+
+    assert dst.read_bytes() == src.read_bytes()
+    expected_hash = blake3.blake3(src.read_bytes()).hexdigest()
+    dst_row = final_writes[-1][1]
+    assert dst_row[2] == src.stat().st_size
+    assert dst_row[4] == expected_hash
+
+
+async def test_copy_fails_when_copy_file_range_stops_short(copy_task, monkeypatch):
+    calls = 0
+
+    def short_copy(src_fd, dst_fd, count, *args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            return 0
+        return os.write(dst_fd, os.read(src_fd, 1024))
+
+    monkeypatch.setattr(os, "copy_file_range", short_copy, raising=False)
+    task, _, _ = copy_task
+
+    with pytest.raises(OSError, match="stopped at 1024"):
+        await QueueWorker()._execute_copy(task)
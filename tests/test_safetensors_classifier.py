@@ -0,0 +1,327 @@
+"""Golden-header tests for the safetensors model-family classifier.
+
+Each case is a minimal header carrying the tensor names (and, where the
+classifier reads them, shapes, metadata or the relpath) that identify one
+family. The expected tags and signals match the classifier as it was before
+the signal-table rewrite, so any drift in scoring shows up here.
+"""
+
+import pytest
+
+from app.services.safetensors_classifier import classify_safetensors_header
+
+
+def _t(*shape: int, dtype: str = "F16") -> dict:
+    return {"dtype": dtype, "shape": list(shape), "data_offsets": [0, 0]}
+
+
+GOLDEN_HEADERS = [
+    pytest.param(
+        {
+            "conditioner.embedders.0.transformer.text_model.embeddings.token_embedding.weight": _t(49408, 768),
+            "conditioner.embedders.1.model.ln_final.weight": _t(1280),
+            "model.diffusion_model.input_blocks.0.0.weight": _t(320, 4, 3, 3),
+            "first_stage_model.decoder.conv_in.weight": _t(512, 4, 3, 3),
+        },
+        None,
+        [("sdxl", 0.92)],
+        ["sdxl:dual_text", "sdxl:unet", "sdxl:vae"],
+        id="sdxl",
+    ),
+    pytest.param(
+        {
+            "conditioner.embedders.0.model.ln_final.weight": _t(1280),
+            "model.diffusion_model.input_blocks.0.0.weight": _t(384, 4, 3, 3),
+            "first_stage_model.decoder.conv_in.weight": _t(512, 4, 3, 3),
+            "__metadata__": {"modelspec.title": "SDXL Refiner"},
+        },
+        None,
+        [("sdxl-refiner", 0.97)],
+        [
+            "sdxl-refiner:openclip",
+            "sdxl-refiner:no_clip_text",
+            "sdxl-refiner:unet",
+            "sdxl-refiner:vae",
+            "meta:refiner",
+        ],
+        id="sdxl-refiner",
+    ),
+    pytest.param(
+        {
+            "cond_stage_model.transformer.text_model.embeddings.token_embedding.weight": _t(49408, 768),
+            "model.diffusion_model.input_blocks.0.0.weight": _t(320, 4, 3, 3),
+            "first_stage_model.decoder.conv_in.weight": _t(512, 4, 3, 3),
+            "__metadata__": {"modelspec.architecture": "stable-diffusion-v1-5 sd1.5"},
+        },
+        None,
+        [("sd1/2", 0.93)],
+        ["sd1:cond_stage", "sd1:unet", "sd1:vae", "meta:sd15"],
+        id="sd1",
+    ),
+    pytest.param(
+        {
+            "double_blocks.0.img_attn.qkv.weight": _t(9216, 3072),
+            "double_blocks.0.txt_attn.qkv.weight": _t(9216, 3072),
+            "single_blocks.0.linear1.weight": _t(21504, 3072),
+        },
+        None,
+        [("flux", 0.9)],
+        ["flux:double_blocks", "flux:img_txt_attn"],
+        id="flux",
+    ),
+    pytest.param(
+        {
+            "conditioner.main_image_encoder.model.embeddings.weight": _t(1024, 3, 14, 14),
+            "conditioner.main_text_encoder.weight": _t(1024, 1024),
+            "model.blocks.0.attn.weight": _t(1024, 1024),
+        },
+        None,
+        [("hunyuan3d", 0.9)],
+        ["hunyuan:main_encoder", "hunyuan:dual_encoder"],
+        id="hunyuan3d",
+    ),
+    pytest.param(
+        {
+            "model.diffusion_model.transformer_blocks.0.attn1.to_q.weight": _t(4096, 4096),
+            "model.diffusion_model.transformer_blocks.0.audio_attn1.to_q.weight": _t(2048, 2048),
+            "__metadata__": {"config": '{"_class_name": "AVTransformer3DModel"}'},
+        },
+        None,
+        [("ltx-2", 0.9)],
+        ["ltx:transformer_blocks+audio", "meta:ltx2"],
+        id="ltx-2",
+    ),
+    pytest.param(
+        {
+            "cap_embedder.0.weight": _t(2560),
+            "context_refiner.0.attention.qkv.weight": _t(11520, 3840),
+            "layers.0.adaLN_modulation.0.weight": _t(15360, 256),
+            "noise_refiner.0.attention.qkv.weight": _t(11520, 3840),
+            "x_embedder.weight": _t(3840, 64),
+        },
+        None,
+        [("zit", 0.92)],
+        ["zit:cap_embedder+context_refiner+adaln", "zit:noise_refiner", "zit:x_embedder"],
+        id="zit",
+    ),
+    pytest.param(
+        {
+            "input_hint_block.0.weight": _t(16, 3, 3, 3),
+            "zero_convs.0.0.weight": _t(320, 320, 1, 1),
+            "input_blocks.1.1.transformer_blocks.0.attn2.to_k.weight": _t(320, 768),
+        },
+        None,
+        [("controlnet-sd1", 0.9), ("controlnet", 0.88)],
+        ["controlnet:input_hint/zero_convs", "controlnet-base:sd1(768)"],
+        id="controlnet-sd1",
+    ),
+    pytest.param(
+        {
+            "control_model.input_hint_block.0.weight": _t(16, 3, 3, 3),
+            "zero_convs.0.0.weight": _t(320, 320, 1, 1),
+            "input_blocks.1.1.transformer_blocks.0.attn2.to_k.weight": _t(320, 1024),
+        },
+        None,
+        [("controlnet-sd2", 0.9), ("controlnet", 0.88)],
+        ["controlnet:input_hint/zero_convs", "controlnet-base:sd2(1024)"],
+        id="controlnet-sd2",
+    ),
+    pytest.param(
+        {
+            "controlnet_cond_embedding.conv_in.weight": _t(16, 3, 3, 3),
+            "add_embedding.linear_1.weight": _t(1280, 2816),
+            "down_blocks.1.attentions.0.transformer_blocks.0.attn2.to_k.weight": _t(640, 2048),
+        },
+        None,
+        [("controlnet", 0.92), ("controlnet-sdxl", 0.85)],
+        ["controlnet:input_hint/zero_convs", "controlnet:cond_embedding", "controlnet-base:sdxl(>=1280)"],
+        id="controlnet-sdxl",
+    ),
+    pytest.param(
+        {
+            "controlnet_blocks.0.weight": _t(3072, 3072),
+            "controlnet_single_blocks.0.weight": _t(3072, 3072),
+            "context_embedder.weight": _t(3072, 4096),
+            "controlnet_mode_embedder.weight": _t(10, 3072),
+            "transformer_blocks.0.attn.add_k_proj.weight": _t(3072, 3072),
+        },
+        None,
+        [("controlnet-flux", 0.94), ("controlnet", 0.92)],
+        [
+            "controlnet:input_hint/zero_convs",
+            "controlnet:flux_blocks",
+            "controlnet-flux:blocks+context",
+            "controlnet-flux:mode_embedder",
+        ],
+        id="controlnet-flux",
+    ),
+    pytest.param(
+        {
+            "lllite_unet_input_blocks_4_1_transformer_blocks_0_attn1_to_q.down.weight": _t(32, 640),
+        },
+        "controlnet/sdxl_lllite_canny.safetensors",
+        [("controlnet", 0.92), ("controlnet-sdxl", 0.82)],
+        ["controlnet:input_hint/zero_convs", "controlnet:lllite", "path:controlnet", "path:lllite", "path:xl"],
+        id="controlnet-lllite",
+    ),
+    pytest.param(
+        {
+            "lora_controlnet": _t(0, dtype="U8"),
+            "input_hint_block.0.weight": _t(16, 3, 3, 3),
+        },
+        None,
+        [("lora", 0.9), ("controlnet", 0.88), ("controlnet-lora", 0.85)],
+        ["controlnet:input_hint/zero_convs", "controlnet:lora", "controlnet:lora", "lora:keys", "lora:dtype=F16"],
+        id="controlnet-lora",
+    ),
+    pytest.param(
+        {
+            "adapter.body.0.resnets.0.block1.weight": _t(320, 320, 3, 3),
+            "adapter.conv_in.weight": _t(320, 192, 3, 3),
+        },
+        "t2i-adapter/t2iadapter_openpose_sd14v1.safetensors",
+        [("t2i-adapter", 0.92)],
+        ["t2i:adapter.body", "path:t2i", "path:adapter", "path:openpose"],
+        id="t2i-adapter",
+    ),
+    pytest.param(
+        {
+            "body.0.block1.weight": _t(320, 320, 3, 3),
+            "body.0.in_conv.weight": _t(320, 320, 1, 1),
+            "conv_in.weight": _t(320, 192, 3, 3),
+        },
+        None,
+        [("t2i-adapter", 0.72)],
+        ["t2i:body.blocks"],
+        id="t2i-adapter-body",
+    ),
+    pytest.param(
+        {
+            "blocks.0.cross_attn.k.weight": _t(5120, 5120),
+            "blocks.0.self_attn.q.weight": _t(5120, 5120),
+            "head.head.weight": _t(64, 5120),
+        },
+        "diffusion_models/wan2.2_t2v_high_noise_14B_fp8.safetensors",
+        [("wan2.2", 0.88)],
+        ["path:wan2.2", "wan:blocks+cross_attn"],
+        id="wan2.2",
+    ),
+    pytest.param(
+        {
+            "model.diffusion_model.blocks.0.cross_attn.k.weight": _t(1536, 1536),
+            "__metadata__": {"model": "Wan2.1 T2V 1.3B"},
+        },
+        None,
+        [("wan2.1", 0.88)],
+        ["meta:wan2.1", "wan:blocks+cross_attn"],
+        id="wan2.1",
+    ),
+    pytest.param(
+        {
+            "lora_unet_input_blocks_4_1_transformer_blocks_0_attn2_to_k.lora_down.weight": _t(16, 2048),
+            "lora_unet_input_blocks_4_1_transformer_blocks_0_attn2_to_k.lora_up.weight": _t(640, 16),
+            "lora_te1_text_model_encoder_layers_0_mlp_fc1.lora_down.weight": _t(16, 768),
+            "lora_te2_text_model_encoder_layers_0_mlp_fc1.lora_down.weight": _t(16, 1280),
+        },
+        None,
+        [("lora", 0.9), ("lora-sdxl", 0.88), ("lora-te", 0.82)],
+        ["lora:keys", "lora:rank=16", "lora:ctx_dim=2048", "lora:dtype=F16", "lora:text_encoder", "lora:ctx=2048"],
+        id="lora-sdxl",
+    ),
+    pytest.param(
+        {
+            "lora_unet_down_blocks_0_attentions_0_transformer_blocks_0_attn2_to_k.lora_down.weight": _t(8, 768),
+            "lora_unet_down_blocks_0_attentions_0_transformer_blocks_0_attn1_to_k.lora_down.weight": _t(8, 320),
+            "lora_te_text_model_encoder_layers_0_mlp_fc1.lora_down.weight": _t(8, 768),
+            "__metadata__": {"ss_base_model_version": "sd_v1"},
+        },
+        None,
+        [("lora", 0.9), ("lora-sd1", 0.85), ("lora-te", 0.82)],
+        [
+            "lora:keys",
+            "lora:rank=8",
+            "lora:channel_dim=320",
+            "lora:ctx_dim=768",
+            "lora:dtype=F16",
+            "lora:text_encoder",
+            "lora:ctx=768",
+        ],
+        id="lora-sd1",
+    ),
+    pytest.param(
+        {
+            "lora_unet_down_blocks_0_attentions_0_transformer_blocks_0_attn2_to_k.lora_down.weight": _t(
+                4, 1024, dtype="F32"
+            ),
+        },
+        None,
+        [("lora", 0.9), ("lora-sd2", 0.85)],
+        ["lora:keys", "lora:rank=4", "lora:ctx_dim=1024", "lora:dtype=F32", "lora:ctx=1024"],
+        id="lora-sd2",
+    ),
+    pytest.param(
+        {
+            "lora_unet_down_blocks_0_attentions_0_transformer_blocks_0_attn1_to_k.lora_down.weight": _t(4, 320),
+        },
+        None,
+        [("lora", 0.9), ("lora-sd1/2", 0.72)],
+        ["lora:keys", "lora:rank=4", "lora:channel_dim=320", "lora:dtype=F16", "lora:unet_only"],
+        id="lora-sd1/2",
+    ),
+    pytest.param(
+        {
+            "diffusion_model.blocks.0.cross_attn.k.lora_A.weight": _t(32, 5120, dtype="BF16"),
+            "diffusion_model.blocks.0.cross_attn.k.lora_B.weight": _t(5120, 32, dtype="BF16"),
+        },
+        None,
+        [("lora", 0.9), ("lora-wan", 0.9)],
+        ["lora:keys", "lora:dtype=BF16", "lora:wan_hidden>=4096"],
+        id="lora-wan",
+    ),
+    pytest.param(
+        {
+            "diffusion_model.blocks.0.cross_attn.k_img.lora_A.weight": _t(32, 5120, dtype="BF16"),
+            "diffusion_model.blocks.0.cross_attn.k.lora_A.weight": _t(32, 5120, dtype="BF16"),
+        },
+        None,
+        [("lora-wan-i2v", 0.92), ("lora", 0.9)],
+        ["lora:keys", "lora:dtype=BF16", "lora:wan_hidden>=4096", "lora:wan_img_attn"],
+        id="lora-wan-i2v",
+    ),
+    pytest.param(
+        {
+            "transformer_blocks.0.attn.add_k_proj.lora_A.weight": _t(16, 3072, dtype="BF16"),
+            "transformer_blocks.0.ff.net.0.proj.lora_A.weight": _t(16, 3072, dtype="BF16"),
+            "transformer_blocks.0.img_mlp.net.0.proj.lora_A.weight": _t(16, 3072, dtype="BF16"),
+        },
+        None,
+        [("lora", 0.9), ("lora-flux", 0.84)],
+        ["lora:keys", "lora:dtype=BF16", "lora:flux_transformer"],
+        id="lora-flux",
+    ),
+    pytest.param(
+        {
+            "diffusion_model.layers.0.attention.to_k.lora_A.weight": _t(32, 3840, dtype="BF16"),
+            "__metadata__": {"base_model": "Z-Image Turbo"},
+        },
+        None,
+        [("lora", 0.9), ("lora-zit", 0.88)],
+        ["lora:keys", "lora:dtype=BF16", "meta:zimage"],
+        id="lora-zit",
+    ),
+]
+
+
+@pytest.mark.parametrize("header, relpath, tags, signals", GOLDEN_HEADERS)
+def test_golden_header(header, relpath, tags, signals):
+    result = classify_safetensors_header(header, relpath)
+
+    assert [(tag["name"], tag["confidence"]) for tag in result["tags"]] == tags
+    assert result["confidence"] == tags[0][1]
+    assert result["signals"] == signals
+
+
+def test_metadata_only_header_has_no_tags():
+    result = classify_safetensors_header({"__metadata__": {"format": "pt"}})
+
+    assert result == {"tags": [], "confidence": 0.0, "signals": []}